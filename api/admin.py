@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CustomUser, Hobby, FriendRequest, PageView
+from .models import CustomUser, Hobby, FriendRequest, FriendSuggestion, Friendship, PageView
 
 @admin.register(CustomUser)
 class CustomUserAdmin(admin.ModelAdmin):
@@ -13,6 +13,14 @@ class HobbyAdmin(admin.ModelAdmin):
 class FriendRequestAdmin(admin.ModelAdmin):
     list_display = ('from_user', 'to_user', 'accepted', 'created_at')
 
+@admin.register(Friendship)
+class FriendshipAdmin(admin.ModelAdmin):
+    list_display = ('user', 'friend', 'created_at')
+
+@admin.register(FriendSuggestion)
+class FriendSuggestionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'candidate', 'score', 'mutual_friends', 'common_hobbies')
+
 @admin.register(PageView)
 class PageViewAdmin(admin.ModelAdmin):
     list_display = ('id', 'count')
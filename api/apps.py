@@ -4,3 +4,20 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import m2m_changed, post_delete, post_save
+
+        from .auth import user_changed
+        from .metrics import instrument_connection
+        from .models import CustomUser, Hobby
+        from .similarity import hobbies_changed, hobby_rows_deleted
+
+        connection_created.connect(instrument_connection, dispatch_uid='api.metrics')
+        # A deactivated user or changed password must not outlive the cached copy
+        post_save.connect(user_changed, sender=CustomUser, dispatch_uid='api.auth.save')
+        post_delete.connect(user_changed, sender=CustomUser, dispatch_uid='api.auth.delete')
+        m2m_changed.connect(hobbies_changed, sender=CustomUser.hobbies.through, dispatch_uid='api.similarity')
+        for model in (CustomUser, Hobby):
+            post_delete.connect(hobby_rows_deleted, sender=model, dispatch_uid=f'api.similarity.{model.__name__}')
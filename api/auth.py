@@ -0,0 +1,84 @@
+"""
+Per-process cache of authenticated users.
+
+AuthenticationMiddleware loads request.user with one SELECT on every request.
+CachedModelBackend keeps recently seen users in an in-process LRUCache
+instead, each stored under a version stamp kept in Django's cache. Writes to
+a user's row replace its stamp (invalidate_users), so the next request
+reloads it; rebuild_counters() replaces a global generation that invalidates
+everyone. Every save or delete of a CustomUser, wherever it comes from (the API,
+the admin, a shell, changepassword), invalidates it through user_changed,
+connected in ApiConfig.ready(); queryset updates call invalidate_users()
+themselves. Entries also expire after AUTH_USER_CACHE_TTL seconds, which
+bounds how long another worker with a per-process cache backend can serve
+a change it never saw.
+
+Enabled by AUTH_USER_CACHE_SIZE > 0, see project/settings.py.
+"""
+import copy
+from typing import Iterable, Optional, Tuple
+
+from django.contrib.auth.backends import ModelBackend
+from django.db import transaction
+
+from .caching import LRUCache, current_stamps, replace_stamps, setting
+
+VERSION_KEY = 'auth-user:{pk}:version'
+GENERATION_KEY = 'auth-user:generation'
+
+user_cache = LRUCache(setting('AUTH_USER_CACHE_SIZE'), setting('AUTH_USER_CACHE_TTL', 60))
+
+
+def user_stamp(pk) -> Tuple[int, int]:
+    """(generation, version) of a user."""
+    version_key = VERSION_KEY.format(pk=pk)
+    values = current_stamps([GENERATION_KEY, version_key])
+    return values[GENERATION_KEY], values[version_key]
+
+
+def _replace_versions(pks) -> None:
+    user_cache.discard(pks)
+    replace_stamps(VERSION_KEY.format(pk=pk) for pk in pks)
+
+
+def _replace_generation() -> None:
+    user_cache.clear()
+    replace_stamps([GENERATION_KEY])
+
+
+def invalidate_users(pks: Iterable[int]) -> None:
+    """
+    Call after writing to CustomUser rows so their cached copies reload. Runs
+    on commit, so no request can re-cache the old row under the new stamp.
+    """
+    pks = list(pks)
+    if pks and user_cache.enabled:
+        transaction.on_commit(lambda: _replace_versions(pks))
+
+
+def user_changed(sender, instance, **kwargs) -> None:
+    """post_save/post_delete receiver for CustomUser."""
+    invalidate_users([instance.pk])
+
+
+def invalidate_all_users() -> None:
+    """Call after bulk updates that touch every user."""
+    if user_cache.enabled:
+        transaction.on_commit(_replace_generation)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose get_user() is served from user_cache when fresh."""
+
+    def get_user(self, user_id) -> Optional[object]:
+        if not user_cache.enabled:
+            return super().get_user(user_id)
+        stamp = user_stamp(user_id)
+        user = user_cache.get(user_id, stamp)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache.put(user_id, copy.deepcopy(user), stamp)
+            return user
+        # Views annotate request.user; never hand out the cached instance
+        return copy.deepcopy(user)
@@ -0,0 +1,143 @@
+"""
+Building blocks shared by the in-process caches.
+
+LRUCache is a thread-safe, size-bounded LRU whose entries can carry a stamp
+and expire after a TTL. Stamps are opaque values kept in Django's cache: a
+writer replaces a stamp with new_stamp(), and every entry stored under the
+old one stops matching. current_stamp() creates a stamp that has never been
+seen before when the key is missing (first use, or evicted), so a lost stamp
+can only cause misses, never a stale hit.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Union
+
+from django.conf import settings
+from django.core.cache import cache
+
+_MISSING = object()
+
+
+def setting(name: str, default=0) -> Callable[[], object]:
+    """A callable reading settings.<name>, so override_settings applies."""
+    return lambda: getattr(settings, name, default)
+
+
+class LRUCache:
+    """
+    A thread-safe LRU of {key: (stamp, expires_at, value)} that counts its
+    hits, misses and evictions. `max_size` and `ttl` (seconds, None for no
+    expiry) may be callables, read on every use; a max_size of 0 disables it.
+    """
+
+    def __init__(self, max_size: Union[int, Callable[[], int]], ttl=None):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size() if callable(self._max_size) else self._max_size
+
+    @property
+    def ttl(self) -> Optional[float]:
+        return self._ttl() if callable(self._ttl) else self._ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, key: Hashable, stamp=None, default=None):
+        """The value stored under `key` with this `stamp`, or `default`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                entry[0] != stamp or (entry[1] is not None and entry[1] < time.monotonic())
+            ):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def put(self, key: Hashable, value, stamp=None) -> None:
+        max_size = self.max_size
+        if max_size <= 0:
+            return
+        ttl = self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (stamp, expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def new_stamp() -> int:
+    return time.time_ns()
+
+
+def current_stamps(keys: Iterable[str]) -> Dict[str, int]:
+    """The stamps stored under `keys`, creating any that are missing."""
+    keys = list(keys)
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, new_stamp(), timeout=None)
+            values[key] = cache.get(key)
+    return values
+
+
+def current_stamp(key: str) -> int:
+    return current_stamps([key])[key]
+
+
+async def acurrent_stamp(key: str) -> int:
+    """Async equivalent of current_stamp()."""
+    value = await cache.aget(key, _MISSING)
+    if value is _MISSING:
+        await cache.aadd(key, new_stamp(), timeout=None)
+        value = await cache.aget(key)
+    return value
+
+
+def replace_stamps(keys: Iterable[str]) -> int:
+    """
+    Give every key a new stamp, invalidating what was stored under the old.
+    Returns the new stamp.
+    """
+    stamp = new_stamp()
+    cache.set_many({key: stamp for key in keys}, timeout=None)
+    return stamp
@@ -0,0 +1,86 @@
+"""
+Read-through cache of the serialized hobby catalogue.
+
+The catalogue is read on every hobbies page load but only changes when a new
+hobby is created, so the serialized list is kept in Django's cache under a
+versioned key. Creating a hobby replaces the version stamp, which makes every
+worker sharing the cache miss once and reload. With a per-process backend
+(the default LocMemCache) other workers never see that, so entries also
+expire after HOBBY_CATALOGUE_TTL seconds.
+"""
+import hashlib
+import json
+from typing import List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .caching import acurrent_stamp, current_stamp, replace_stamps
+
+VERSION_KEY = 'hobby-catalogue:version'
+DATA_KEY = 'hobby-catalogue:{version}'
+# The ETag alone, so conditional requests need not load the whole list
+ETAG_KEY = 'hobby-catalogue:{version}:etag'
+
+
+def catalogue_ttl() -> int:
+    return getattr(settings, 'HOBBY_CATALOGUE_TTL', 300)
+
+
+def catalogue_version() -> int:
+    return current_stamp(VERSION_KEY)
+
+
+def invalidate_hobby_catalogue() -> None:
+    """
+    Call after creating a Hobby so the next read reloads the catalogue. Runs
+    on commit, so no request can re-cache the old list under the new stamp.
+    """
+    transaction.on_commit(lambda: replace_stamps([VERSION_KEY]))
+
+
+def catalogue_etag():
+    """The current catalogue's ETag, or None if it has not been built yet."""
+    return cache.get(ETAG_KEY.format(version=catalogue_version()))
+
+
+def _catalogue_entry(data: List[dict]) -> Tuple[str, List[dict]]:
+    digest = hashlib.md5(
+        json.dumps(data, separators=(',', ':')).encode(), usedforsecurity=False
+    ).hexdigest()
+    return '"{}"'.format(digest), data
+
+
+def hobby_catalogue() -> Tuple[str, List[dict]]:
+    """
+    Return (etag, serialized hobbies). The ETag is a hash of the content, so it
+    stays valid across workers even with a per-process cache backend.
+    """
+    from .models import Hobby
+    from .serializers import HobbySerializer
+
+    version = catalogue_version()
+    key = DATA_KEY.format(version=version)
+    cached = cache.get(key)
+    if cached is None:
+        data = HobbySerializer(Hobby.objects.order_by('pk'), many=True).data
+        cached = _catalogue_entry([dict(item) for item in data])
+        cache.set_many({key: cached, ETAG_KEY.format(version=version): cached[0]}, timeout=catalogue_ttl())
+    return cached
+
+
+async def ahobby_catalogue() -> Tuple[str, List[dict]]:
+    """Async equivalent of hobby_catalogue()."""
+    from .models import Hobby
+    from .serializers import HobbySerializer
+
+    version = await acurrent_stamp(VERSION_KEY)
+    key = DATA_KEY.format(version=version)
+    cached = await cache.aget(key)
+    if cached is None:
+        hobbies = [hobby async for hobby in Hobby.objects.order_by('pk')]
+        data = HobbySerializer(hobbies, many=True).data
+        cached = _catalogue_entry([dict(item) for item in data])
+        await cache.aset_many({key: cached, ETAG_KEY.format(version=version): cached[0]}, timeout=catalogue_ttl())
+    return cached
@@ -0,0 +1,69 @@
+"""
+Denormalised per-user friend and pending-request counters.
+
+CustomUser.friend_count and CustomUser.pending_count are kept in step with
+the Friendship and FriendRequest tables by the code that writes them, using
+F() updates inside the same transaction. rebuild_counters() recomputes them
+from scratch for when they drift (admin edits, raw SQL, failed deploys).
+
+Every counter change also bumps CustomUser.version in the same UPDATE, as
+the counters are part of the user's API payloads; touch() bumps it alone.
+"""
+from collections import Counter
+from typing import Iterable
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .auth import invalidate_all_users, invalidate_users
+
+
+def bump(user_ids: Iterable[int], field: str, delta: int = 1) -> None:
+    """
+    Add `delta` to `field` once per occurrence of each id, with one UPDATE per
+    distinct total rather than one per user.
+    """
+    from .models import CustomUser
+
+    counts = Counter(user_ids)
+    by_total = {}
+    for user_id, times in counts.items():
+        by_total.setdefault(times * delta, []).append(user_id)
+    for total, ids in by_total.items():
+        value = F(field) + total
+        if total < 0:
+            # Requests created outside the API were never counted; don't underflow
+            value = Greatest(value, Value(0))
+        CustomUser.objects.filter(pk__in=ids).update(**{field: value, 'version': F('version') + 1})
+    invalidate_users(counts)
+
+
+def touch(user_ids: Iterable[int]) -> None:
+    """Bump the version of users whose API payloads changed."""
+    from .models import CustomUser
+
+    user_ids = list(user_ids)
+    if user_ids:
+        CustomUser.objects.filter(pk__in=user_ids).update(version=F('version') + 1)
+        invalidate_users(user_ids)
+
+
+def counter_subqueries(CustomUser, FriendRequest, Friendship) -> dict:
+    """Correlated COUNT subqueries for both counters, usable in update()."""
+    friends = Friendship.objects.filter(user=OuterRef('pk')).order_by().values('user')
+    pending = FriendRequest.objects.filter(to_user=OuterRef('pk'), accepted=False).order_by().values('to_user')
+    return {
+        'friend_count': Coalesce(Subquery(friends.annotate(n=Count('pk')).values('n')), Value(0)),
+        'pending_count': Coalesce(Subquery(pending.annotate(n=Count('pk')).values('n')), Value(0)),
+    }
+
+
+def rebuild_counters() -> int:
+    """Recompute every user's counters in a single UPDATE; returns rows updated."""
+    from .models import CustomUser, FriendRequest, Friendship
+
+    updated = CustomUser.objects.update(
+        version=F('version') + 1, **counter_subqueries(CustomUser, FriendRequest, Friendship)
+    )
+    invalidate_all_users()
+    return updated
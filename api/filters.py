@@ -0,0 +1,54 @@
+"""
+Shared query filters for the user list endpoints.
+"""
+from datetime import date
+from typing import Optional, Tuple
+
+
+def years_before(day: date, years: int) -> date:
+    """The same calendar day `years` earlier, with 29 February becoming the 28th."""
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        return day.replace(year=day.year - years, day=28)
+
+
+def birth_date_bounds(
+    min_age: Optional[int], max_age: Optional[int], today: Optional[date] = None
+) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Return the (earliest, latest) date of birth, both inclusive, of people
+    aged between min_age and max_age today. Either bound may be None.
+    """
+    today = today or date.today()
+    latest = years_before(today, min_age) if min_age is not None else None
+    earliest = None
+    if max_age is not None:
+        # Still max_age until the day before their (max_age + 1)th birthday
+        earliest = date.fromordinal(years_before(today, max_age + 1).toordinal() + 1)
+    return earliest, latest
+
+
+def parse_age(value) -> Optional[int]:
+    """An age query parameter as an int, or None when missing or unparsable."""
+    if value in (None, ''):
+        return None
+    try:
+        age = int(value)
+    except (TypeError, ValueError):
+        return None
+    return age if 0 <= age <= 150 else None
+
+
+def filter_by_age(users_qs, min_age_str, max_age_str, today: Optional[date] = None):
+    """
+    Restrict users to an inclusive age range using plain date_of_birth range
+    predicates, so the date_of_birth index serves them. Unparsable bounds are
+    ignored.
+    """
+    earliest, latest = birth_date_bounds(parse_age(min_age_str), parse_age(max_age_str), today)
+    if latest is not None:
+        users_qs = users_qs.filter(date_of_birth__lte=latest)
+    if earliest is not None:
+        users_qs = users_qs.filter(date_of_birth__gte=earliest)
+    return users_qs
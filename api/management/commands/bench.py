@@ -0,0 +1,179 @@
+"""
+Load-generation benchmark for the REST API.
+
+Seeds a throwaway test database with users, hobbies and friend requests using
+bulk inserts, then drives the /api/ endpoints through the Django test client
+and reports latency percentiles, queries per request and requests per second
+as JSON, so results can be diffed between releases. The report also carries
+the query plan of the age-filtered user list query.
+
+    python manage.py bench --users 5000 --requests 200 --output bench.json
+"""
+import json
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from api.counters import rebuild_counters
+from api.filters import filter_by_age
+from api.models import CustomUser, FriendRequest, Friendship, Hobby
+from api.similarity import similarity_index
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = "Seed a test database and report latency and query counts for the /api/ endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--hobbies', type=int, default=200)
+        parser.add_argument('--hobbies-per-user', type=int, default=5)
+        parser.add_argument('--friend-requests', type=int, default=20, help="Sent per user.")
+        parser.add_argument('--requests', type=int, default=100, help="Requests per endpoint.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+        parser.add_argument('--keepdb', action='store_true', help="Keep the test database between runs.")
+
+    def seed(self, options) -> CustomUser:
+        rng = random.Random(options['seed'])
+        # Hash once: every seeded user shares the same password
+        password = make_password('bench-password')
+
+        Hobby.objects.bulk_create(
+            [Hobby(name=f"Hobby {i}") for i in range(options['hobbies'])], batch_size=1000
+        )
+        hobby_ids = list(Hobby.objects.values_list('pk', flat=True))
+
+        CustomUser.objects.bulk_create(
+            [
+                CustomUser(
+                    username=f"bench{i}",
+                    password=password,
+                    name=f"Bench User {i}",
+                    email=f"bench{i}@example.com",
+                    date_of_birth=f"{rng.randint(1950, 2006)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                )
+                for i in range(options['users'])
+            ],
+            batch_size=1000,
+        )
+        user_ids = list(CustomUser.objects.order_by('pk').values_list('pk', flat=True))
+
+        through = CustomUser.hobbies.through
+        through.objects.bulk_create(
+            [
+                through(customuser_id=user_id, hobby_id=hobby_id)
+                for user_id in user_ids
+                for hobby_id in rng.sample(hobby_ids, min(options['hobbies_per_user'], len(hobby_ids)))
+            ],
+            batch_size=5000,
+        )
+
+        requests = []
+        friendships = []
+        for user_id in user_ids:
+            others = rng.sample(user_ids, min(options['friend_requests'] + 1, len(user_ids)))
+            for other_id in others[:options['friend_requests'] + 1]:
+                if other_id == user_id:
+                    continue
+                accepted = rng.random() < 0.5
+                requests.append(FriendRequest(from_user_id=user_id, to_user_id=other_id, accepted=accepted))
+                if accepted:
+                    friendships.append(Friendship(user_id=user_id, friend_id=other_id))
+                    friendships.append(Friendship(user_id=other_id, friend_id=user_id))
+        FriendRequest.objects.bulk_create(requests, batch_size=5000, ignore_conflicts=True)
+        Friendship.objects.bulk_create(friendships, batch_size=5000, ignore_conflicts=True)
+        rebuild_counters()
+
+        return CustomUser.objects.get(pk=user_ids[0])
+
+    def endpoints(self) -> Dict[str, List[str]]:
+        return {
+            'user-list': [reverse('user-list'), reverse('user-list') + '?page=5', reverse('user-list') + '?min_age=20&max_age=40'],
+            'current-user-friends': [reverse('current-user-friends')],
+            'hobbies-view': [reverse('hobbies-view')],
+            'friend-request': [reverse('friend-request')],
+        }
+
+    def measure(self, client: Client, urls: List[str], count: int) -> dict:
+        latencies = []
+        queries = []
+        started = time.perf_counter()
+        for i in range(count):
+            url = urls[i % len(urls)]
+            with CaptureQueriesContext(connection) as captured:
+                request_started = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - request_started) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} returned {response.status_code}")
+            queries.append(len(captured))
+        elapsed = time.perf_counter() - started
+        return {
+            'requests': count,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'mean_queries': round(statistics.mean(queries), 2),
+            'max_queries': max(queries),
+            'requests_per_second': round(count / elapsed, 1),
+        }
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            if not CustomUser.objects.exists():
+                seed_started = time.perf_counter()
+                user = self.seed(options)
+                seed_seconds = time.perf_counter() - seed_started
+            else:
+                user = CustomUser.objects.order_by('pk').first()
+                seed_seconds = 0.0
+            cache.clear()
+            similarity_index.rebuild()
+
+            age_filtered = filter_by_age(CustomUser.objects.exclude(pk=user.pk), '20', '40')
+            query_plans = {'user-list: age filter': age_filtered.explain()}
+
+            client = Client()
+            client.force_login(user)
+            results = {
+                name: self.measure(client, urls, options['requests'])
+                for name, urls in self.endpoints().items()
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        report = {
+            'config': {
+                key: options[key]
+                for key in ('users', 'hobbies', 'hobbies_per_user', 'friend_requests', 'requests', 'seed')
+            },
+            'database': connection.vendor,
+            'seed_seconds': round(seed_seconds, 3),
+            'endpoints': results,
+            'query_plans': query_plans,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+        else:
+            self.stdout.write(output)
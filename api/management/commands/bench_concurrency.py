@@ -0,0 +1,150 @@
+"""
+Concurrent benchmark of the database configuration under gunicorn.
+
+Seeds a scratch SQLite database, then for each profile starts gunicorn with
+several workers against it and hits the read endpoints from many client
+threads at once. The "baseline" profile closes connections after every
+request and uses SQLite's default rollback journal; "tuned" uses the
+persistent connections and WAL/mmap pragmas from project/database.py.
+
+    python manage.py bench_concurrency --workers 4 --clients 16 --requests 400
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from .bench import percentile
+
+PROFILES = {
+    'baseline': {'DATABASE_CONN_MAX_AGE': '0', 'DATABASE_SQLITE_PRAGMAS': '0'},
+    'tuned': {'DATABASE_CONN_MAX_AGE': '60', 'DATABASE_SQLITE_PRAGMAS': '1'},
+}
+PATHS = ['/api/users/', '/api/users/current/friends/', '/api/friend-requests/', '/api/users/current/']
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = "Compare database profiles under concurrent gunicorn workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--clients', type=int, default=16, help="Concurrent client threads.")
+        parser.add_argument('--requests', type=int, default=400, help="Requests per profile.")
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--profile', action='append', choices=sorted(PROFILES), help="Profiles to run (default: all).")
+        parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+        parser.add_argument('--prepare', action='store_true', help=argparse.SUPPRESS)
+
+    def prepare(self, options):
+        """Runs in a child process pointed at the scratch database."""
+        from django.contrib.sessions.backends.db import SessionStore
+        from django.core.management import call_command
+
+        from api.management.commands.bench import Command as Bench
+
+        call_command('migrate', verbosity=0)
+        bench_options = {'users': options['users'], 'hobbies': 200, 'hobbies_per_user': 5, 'friend_requests': 20, 'seed': 0}
+        user = Bench().seed(bench_options)
+        session = SessionStore()
+        session['_auth_user_id'] = str(user.pk)
+        session['_auth_user_backend'] = 'django.contrib.auth.backends.ModelBackend'
+        session['_auth_user_hash'] = user.get_session_auth_hash()
+        session.create()
+        self.stdout.write(session.session_key)
+
+    def run_profile(self, env: dict, session_key: str, options) -> dict:
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'project.wsgi', '--bind', f'127.0.0.1:{port}',
+             '--workers', str(options['workers']), '--log-level', 'warning'],
+            cwd=settings.BASE_DIR, env=env,
+        )
+        base = f'http://127.0.0.1:{port}'
+        try:
+            for _ in range(100):
+                try:
+                    urllib.request.urlopen(base + '/health', timeout=1)
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            else:
+                raise CommandError("gunicorn did not start")
+
+            def fetch(i: int) -> float:
+                request = urllib.request.Request(
+                    base + PATHS[i % len(PATHS)], headers={'Cookie': f'sessionid={session_key}'}
+                )
+                started = time.perf_counter()
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    response.read()
+                return (time.perf_counter() - started) * 1000
+
+            # Warm every worker up before timing
+            with ThreadPoolExecutor(options['clients']) as pool:
+                list(pool.map(fetch, range(options['workers'] * len(PATHS))))
+            started = time.perf_counter()
+            with ThreadPoolExecutor(options['clients']) as pool:
+                latencies: List[float] = list(pool.map(fetch, range(options['requests'])))
+            elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        return {
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'mean_ms': round(statistics.mean(latencies), 3),
+            'requests_per_second': round(len(latencies) / elapsed, 1),
+        }
+
+    def handle(self, *args, **options):
+        if options['prepare']:
+            return self.prepare(options)
+
+        with tempfile.TemporaryDirectory() as scratch:
+            env = dict(
+                os.environ,
+                DATABASE_NAME=os.path.join(scratch, 'bench.sqlite3'),
+                DATABASE_SERVICE_NAME='',
+                PASSWORD_HASHER_PROFILE='fast',
+            )
+            prepared = subprocess.run(
+                [sys.executable, 'manage.py', 'bench_concurrency', '--prepare', '--users', str(options['users'])],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+            )
+            session_key = prepared.stdout.strip().splitlines()[-1]
+
+            results = {
+                name: self.run_profile(dict(env, **PROFILES[name]), session_key, options)
+                for name in options['profile'] or sorted(PROFILES)
+            }
+
+        report = {
+            'config': {key: options[key] for key in ('workers', 'clients', 'requests', 'users')},
+            'paths': PATHS,
+            'profiles': results,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+        else:
+            self.stdout.write(output)
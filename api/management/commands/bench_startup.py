@@ -0,0 +1,76 @@
+"""
+Worker boot benchmark: runs what a gunicorn worker imports (the WSGI
+application and the URLconf) under `python -X importtime` in fresh
+interpreters and reports the total import time and the slowest modules as
+JSON, so regressions in boot time show up in a diff.
+
+    python manage.py bench_startup --runs 5 --top 20
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+BOOT = 'from project.wsgi import application; import project.urls'
+
+
+def import_times(stderr: str) -> dict:
+    """Parse -X importtime output into {module: (self_us, cumulative_us)}."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        times[module.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+class Command(BaseCommand):
+    help = "Measure worker boot import time with python -X importtime."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to average over.")
+        parser.add_argument('--top', type=int, default=20, help="Slowest modules to list.")
+        parser.add_argument('--output', help="Write the JSON report here instead of stdout.")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'project.settings'))
+        totals = []
+        cumulative = defaultdict(list)
+        for _ in range(options['runs']):
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', BOOT],
+                cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+            )
+            times = import_times(result.stderr)
+            totals.append(sum(self_us for self_us, _ in times.values()) / 1000)
+            for module, (_, cumulative_us) in times.items():
+                cumulative[module].append(cumulative_us / 1000)
+
+        slowest = sorted(
+            ((module, statistics.median(samples)) for module, samples in cumulative.items()),
+            key=lambda item: -item[1],
+        )
+        app_modules = {
+            module: round(statistics.median(samples), 2)
+            for module, samples in sorted(cumulative.items())
+            if module.split('.')[0] in ('api', 'project')
+        }
+        report = {
+            'runs': options['runs'],
+            'boot': BOOT,
+            'median_total_ms': round(statistics.median(totals), 2),
+            'slowest_cumulative_ms': {module: round(ms, 2) for module, ms in slowest[:options['top']]},
+            'app_modules_cumulative_ms': app_modules,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+        else:
+            self.stdout.write(output)
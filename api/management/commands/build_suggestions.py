@@ -0,0 +1,26 @@
+"""
+Recompute the "people you may know" table from the friendship graph and
+shared hobbies. Meant to run periodically, e.g. from cron:
+
+    python manage.py build_suggestions --top-k 20
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.suggestions import DEFAULT_TOP_K, build_suggestions
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed friend suggestions for every user."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K, help="Suggestions kept per user.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Users written per transaction.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = build_suggestions(top_k=options['top_k'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} suggestions in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,48 @@
+"""
+Print the database's query plan for each query the REST API issues, so a
+missing index shows up as a table scan before it shows up as latency.
+
+    python manage.py explain_queries [--user <id>]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api.filters import filter_by_age
+from api.models import CustomUser, Hobby
+from api.serializers import _hobby_name_rows
+from api.similarity import RankedUserList, similarity_index
+from api.views_api import USERS_PER_PAGE, pending_friend_requests, user_suggestions
+
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN output for the queries behind each /api/ endpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help="User id to build the queries for (default: first user).")
+
+    def api_queries(self, user):
+        # Built the way the views build them, so the plans are the ones served
+        users_qs = filter_by_age(CustomUser.objects.exclude(pk=user.pk), '20', '30')
+        users_list = RankedUserList(users_qs, similarity_index.ranked(user.pk))
+        if users_list.ranking:
+            yield 'user-list: ranked head', users_list._ranked()
+        tail = users_list._tail()[:USERS_PER_PAGE]
+        yield 'user-list: unranked tail', tail
+        yield 'user-list: hobby names', _hobby_name_rows(list(tail) or [user])
+        yield 'current-user-friends', user.friends()
+        yield 'friend-request: pending inbox', pending_friend_requests(user)
+        yield 'user-suggestions', user_suggestions(user)
+        yield 'hobbies-view', Hobby.objects.order_by('pk')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = CustomUser.objects.filter(pk=options['user']).first()
+        else:
+            user = CustomUser.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError("No user to build the queries for; create one first.")
+
+        for label, queryset in self.api_queries(user):
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain())
+            self.stdout.write('')
@@ -0,0 +1,17 @@
+"""
+Recompute every user's friend_count and pending_count from the Friendship and
+FriendRequest tables.
+
+    python manage.py rebuild_counters
+"""
+from django.core.management.base import BaseCommand
+
+from api.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalised friend and pending-request counters for all users."
+
+    def handle(self, *args, **options):
+        updated = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {updated} users."))
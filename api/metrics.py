@@ -0,0 +1,210 @@
+"""
+Per-request SQL and timing instrumentation.
+
+RequestMetricsMiddleware times each request, counts its queries and their
+database time, and times the rendering of DRF responses to JSON. Serializer
+work runs inside the view, so the user list and detail views wrap their
+`serializer.data` in a timed('serialize') block; elsewhere it counts towards
+the total only. The numbers go out as a Server-Timing header and are
+aggregated per URL name into an in-process histogram served at /api/metrics/.
+
+Queries are counted by timed_execute, which ApiConfig.ready() installs on
+every database connection as it opens: whichever alias or thread runs the
+query (async views run theirs through sync_to_async), the request's timer is
+found through a context variable.
+
+Enabled with REQUEST_METRICS = True in settings.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# Upper bounds (ms) of the wall-time histogram buckets; the last is open-ended
+BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.db_ms = 0.0
+        self.serialize_ms = 0.0
+        self.render_ms = 0.0
+        self.wall_ms = 0.0
+        self.max_queries = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, queries: int, db_ms: float, serialize_ms: float, render_ms: float, wall_ms: float) -> None:
+        self.requests += 1
+        self.queries += queries
+        self.max_queries = max(self.max_queries, queries)
+        self.db_ms += db_ms
+        self.serialize_ms += serialize_ms
+        self.render_ms += render_ms
+        self.wall_ms += wall_ms
+        self.buckets[bisect_left(BUCKETS_MS, wall_ms)] += 1
+
+    def as_dict(self) -> dict:
+        requests = self.requests or 1
+        labels: List[str] = [f"le_{bound}" for bound in BUCKETS_MS] + ['inf']
+        return {
+            'requests': self.requests,
+            'mean_queries': round(self.queries / requests, 2),
+            'max_queries': self.max_queries,
+            'mean_db_ms': round(self.db_ms / requests, 3),
+            'mean_serialize_ms': round(self.serialize_ms / requests, 3),
+            'mean_render_ms': round(self.render_ms / requests, 3),
+            'mean_wall_ms': round(self.wall_ms / requests, 3),
+            'wall_ms_histogram': dict(zip(labels, self.buckets)),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe per-URL-name aggregation of request timings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, EndpointStats] = {}
+
+    def record(
+        self, url_name: str, queries: int, db_ms: float, serialize_ms: float, render_ms: float, wall_ms: float
+    ) -> None:
+        with self._lock:
+            self._stats.setdefault(url_name, EndpointStats()).add(
+                queries, db_ms, serialize_ms, render_ms, wall_ms
+            )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in sorted(self._stats.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+registry = MetricsRegistry()
+
+
+class QueryTimer:
+    """Counts queries and their duration, and timed() phases, for one request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.serialize_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - started) * 1000
+
+
+# The timer of the request being handled, if metrics are on
+active_timer: ContextVar[Optional[QueryTimer]] = ContextVar('active_query_timer', default=None)
+
+
+def timed_execute(execute, sql, params, many, context):
+    """Execute wrapper passing each query to the active request's timer."""
+    timer = active_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+@contextmanager
+def timed(phase: str):
+    """
+    Add the time spent in the block to the active request's `<phase>_ms`,
+    e.g. `with timed('serialize'): data = serializer.data`. Does nothing when
+    metrics are off.
+    """
+    timer = active_timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        attr = f'{phase}_ms'
+        setattr(timer, attr, getattr(timer, attr) + (time.perf_counter() - started) * 1000)
+
+
+def instrument_connection(sender, connection, **kwargs) -> None:
+    """connection_created receiver installing timed_execute."""
+    if timed_execute not in connection.execute_wrappers:
+        # First, i.e. outermost, so execute_wrapper()'s pop() never removes it
+        connection.execute_wrappers.insert(0, timed_execute)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        timer = QueryTimer()
+        request._render_ms = 0.0
+        token = active_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            active_timer.reset(token)
+        return self.finish(request, response, timer, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        timer = QueryTimer()
+        request._render_ms = 0.0
+        token = active_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            active_timer.reset(token)
+        return self.finish(request, response, timer, started)
+
+    @staticmethod
+    def finish(request, response, timer: QueryTimer, started: float):
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        match = request.resolver_match
+        url_name = match.url_name if match and match.url_name else 'unresolved'
+        registry.record(url_name, timer.queries, timer.db_ms, timer.serialize_ms, request._render_ms, wall_ms)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timer.db_ms:.2f};desc="{timer.queries} queries"',
+            f'serialize;dur={timer.serialize_ms:.2f}',
+            f'render;dur={request._render_ms:.2f}',
+            f'total;dur={wall_ms:.2f}',
+        ])
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; time that render.
+        render_started = time.perf_counter()
+
+        def rendered(response):
+            request._render_ms = (time.perf_counter() - render_started) * 1000
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.1 on 2026-10-17 16:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_friendships(apps, schema_editor):
+    FriendRequest = apps.get_model('api', 'FriendRequest')
+    Friendship = apps.get_model('api', 'Friendship')
+    edges = []
+    for from_id, to_id in FriendRequest.objects.filter(accepted=True).values_list('from_user_id', 'to_user_id'):
+        edges.append(Friendship(user_id=from_id, friend_id=to_id))
+        edges.append(Friendship(user_id=to_id, friend_id=from_id))
+    Friendship.objects.bulk_create(edges, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Friendship',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('friend', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friendships_as_friend', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friendships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'friend')},
+            },
+        ),
+        migrations.RunPython(backfill_friendships, migrations.RunPython.noop),
+    ]
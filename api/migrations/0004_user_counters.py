@@ -0,0 +1,40 @@
+# Generated by Django 5.1.1 on 2026-10-17 17:18
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    # Built here from the historical models, not imported from api.counters,
+    # so later changes to the app code cannot change what this migration does
+    CustomUser = apps.get_model('api', 'CustomUser')
+    FriendRequest = apps.get_model('api', 'FriendRequest')
+    Friendship = apps.get_model('api', 'Friendship')
+    friends = Friendship.objects.filter(user=OuterRef('pk')).order_by().values('user')
+    pending = FriendRequest.objects.filter(to_user=OuterRef('pk'), accepted=False).order_by().values('to_user')
+    CustomUser.objects.update(
+        friend_count=Coalesce(Subquery(friends.annotate(n=Count('pk')).values('n')), Value(0)),
+        pending_count=Coalesce(Subquery(pending.annotate(n=Count('pk')).values('n')), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_friend_request_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='friend_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='pending_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-17 18:08
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_user_version'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='friendrequest',
+            name='friendreq_from_accepted_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='friendrequest',
+            name='friendreq_to_accepted_idx',
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from typing import List
+from typing import List, Tuple
 
 class Hobby(models.Model):
     """
@@ -17,31 +17,25 @@ class CustomUser(AbstractUser):
     Our custom User model. Must match the 'api.CustomUser' reference in settings.py.
     """
     name = models.CharField(max_length=150, blank=True)
-    date_of_birth = models.DateField(null=True, blank=True)
+    # Indexed for the age-range filter in user_list_view
+    date_of_birth = models.DateField(null=True, blank=True, db_index=True)
     # Each user can have multiple hobbies, and each hobby can belong to multiple users
     hobbies = models.ManyToManyField(Hobby, blank=True, related_name='users_with_this_hobby')
+    # Denormalised counters, see api/counters.py
+    friend_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+    # Bumped whenever an API payload showing this user's data or friends
+    # changes; the ETag of the conditional GET views in views_api.py
+    version = models.PositiveIntegerField(default=0)
 
     def friends(self):
         """
         Return a queryset of users who are friends (i.e. accepted FriendRequest)
         with this user.
-        We consider both directions: if I'm from_user or to_user.
+        Both directions are stored in the Friendship table, so this is a single
+        indexed join on Friendship.user.
         """
-        from .models import FriendRequest
-
-        # Friend requests that this user sent AND were accepted
-        sent = FriendRequest.objects.filter(
-            from_user=self, accepted=True
-        ).values_list('to_user', flat=True)
-
-        # Friend requests that this user received AND were accepted
-        received = FriendRequest.objects.filter(
-            to_user=self, accepted=True
-        ).values_list('from_user', flat=True)
-
-        # Combine these user IDs
-        friend_ids = list(sent) + list(received)
-        return CustomUser.objects.filter(id__in=friend_ids)
+        return CustomUser.objects.filter(friendships_as_friend__user=self)
 
 
 class FriendRequest(models.Model):
@@ -59,12 +53,102 @@ class FriendRequest(models.Model):
 
     class Meta:
         unique_together = ('from_user', 'to_user')
+        indexes = [
+            # Pending inbox: only unanswered requests, newest last
+            models.Index(
+                fields=['to_user', 'created_at'],
+                name='friendreq_pending_idx',
+                condition=models.Q(accepted=False),
+            ),
+        ]
 
     def __str__(self) -> str:
         status = "Accepted" if self.accepted else "Pending"
         return f"FriendRequest from {self.from_user.username} to {self.to_user.username} ({status})"
 
 
+class Friendship(models.Model):
+    """
+    One direction of an accepted friendship. Accepting a FriendRequest stores
+    two rows, (from_user, to_user) and (to_user, from_user), so looking up a
+    user's friends never has to scan FriendRequest in both directions.
+    """
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name='friendships'
+    )
+    friend = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name='friendships_as_friend'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'friend')
+
+    @classmethod
+    def link(cls, user_a: 'CustomUser', user_b: 'CustomUser') -> None:
+        """Store both directions of a friendship, ignoring existing rows."""
+        cls.link_ids([(user_a.pk, user_b.pk)])
+
+    @classmethod
+    def link_ids(cls, pairs: List[Tuple[int, int]]) -> int:
+        """
+        Store both directions of many friendships, given as user id pairs, and
+        bump friend_count for each newly linked user. Pairs that are already
+        friends are skipped. Returns the number of new friendships.
+        """
+        from .counters import bump
+
+        pairs = list({(a, b) if a < b else (b, a) for a, b in pairs if a != b})
+        if not pairs:
+            return 0
+        existing = set(
+            cls.objects.filter(
+                user_id__in={a for a, _ in pairs}, friend_id__in={b for _, b in pairs}
+            ).values_list('user_id', 'friend_id')
+        )
+        pairs = [pair for pair in pairs if pair not in existing]
+        cls.objects.bulk_create(
+            [
+                edge
+                for a, b in pairs
+                for edge in (cls(user_id=a, friend_id=b), cls(user_id=b, friend_id=a))
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        bump([user_id for pair in pairs for user_id in pair], 'friend_count')
+        return len(pairs)
+
+    def __str__(self) -> str:
+        return f"Friendship {self.user_id} -> {self.friend_id}"
+
+
+class FriendSuggestion(models.Model):
+    """
+    A precomputed "people you may know" candidate for a user, written by the
+    build_suggestions batch job (see api/suggestions.py) and read in score
+    order by the suggestions endpoint.
+    """
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name='friend_suggestions'
+    )
+    candidate = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name='suggested_to'
+    )
+    score = models.IntegerField()
+    mutual_friends = models.PositiveIntegerField(default=0)
+    common_hobbies = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'candidate')
+        indexes = [
+            models.Index(fields=['user', '-score', 'candidate'], name='suggestion_user_score_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Suggest {self.candidate_id} to {self.user_id} ({self.score})"
+
+
 class PageView(models.Model):
     """
     Example model from your snippet, representing page view count.
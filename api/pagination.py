@@ -0,0 +1,35 @@
+"""
+Opaque cursors for keyset pagination.
+
+A cursor is just the sort key of the last row on a page, JSON encoded and
+base64'd so clients treat it as a token rather than something to edit.
+"""
+import base64
+import binascii
+import json
+from typing import Any, List, Optional
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue."""
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str], length: int) -> Optional[List[Any]]:
+    """
+    Decode a cursor into its key values, or None for an empty cursor (first page).
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor(cursor)
+    return values
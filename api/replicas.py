@@ -0,0 +1,120 @@
+"""
+Read-replica routing for the REST API.
+
+ReplicaRoutingMiddleware marks safe-method /api/ requests as replica
+readable, and ReplicaRouter sends their reads to one of READ_REPLICAS (the
+aliases project.database.replicas() adds from DATABASE_REPLICAS). Writes,
+migrations and everything outside such a request stay on 'default'.
+
+For read-your-writes, every unsafe request stamps the session with its time;
+the same session's reads stay on the primary for READ_REPLICA_PIN_SECONDS
+after that so a user sees their own change even if the replica lags.
+
+Enabled by setting DATABASE_REPLICAS, e.g. for two local SQLite files
+(create the replica with `manage.py migrate --database replica_0`):
+
+    DATABASE_NAME=primary.sqlite3 DATABASE_REPLICAS=sqlite:///replica.sqlite3
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+LAST_WRITE_KEY = '_last_write_at'
+
+# Set by the middleware while a replica-readable request is being handled
+_use_replicas = ContextVar('use_replicas', default=False)
+
+
+def replica_aliases():
+    return getattr(settings, 'READ_REPLICAS', [])
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        aliases = replica_aliases()
+        if not aliases or not _use_replicas.get():
+            return None
+        # Reads inside a transaction on the primary must see its writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+
+def _pinned(last_write) -> bool:
+    if last_write is None:
+        return False
+    return time.time() - last_write < getattr(settings, 'READ_REPLICA_PIN_SECONDS', 5)
+
+
+def pinned_to_primary(session) -> bool:
+    """Whether this session wrote recently enough that it must read its own writes."""
+    return _pinned(session.get(LAST_WRITE_KEY))
+
+
+async def apinned_to_primary(session) -> bool:
+    """Async equivalent of pinned_to_primary()."""
+    return _pinned(await session.aget(LAST_WRITE_KEY))
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not request.path.startswith('/api/'):
+            return self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                request.session[LAST_WRITE_KEY] = time.time()
+            return response
+
+        # The session itself is read from the primary, before routing starts
+        if pinned_to_primary(request.session):
+            return self.get_response(request)
+        token = _use_replicas.set(True)
+        try:
+            return self.get_response(request)
+        finally:
+            _use_replicas.reset(token)
+
+    async def __acall__(self, request):
+        if not request.path.startswith('/api/'):
+            return await self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = await self.get_response(request)
+            if response.status_code < 400:
+                await request.session.aset(LAST_WRITE_KEY, time.time())
+            return response
+
+        if await apinned_to_primary(request.session):
+            return await self.get_response(request)
+        token = _use_replicas.set(True)
+        try:
+            return await self.get_response(request)
+        finally:
+            _use_replicas.reset(token)
@@ -0,0 +1,36 @@
+"""
+Per-process cache of /api/users/ result pages.
+
+Paging and toggling age filters in UsersPage.vue repeats the same few
+requests, each of which ranks and counts the whole user table. user_list_cache
+keeps the response data keyed on the request's parameters and the
+requester's CustomUser.version (bumped when their hobbies change), stamped
+with a global user-table generation kept in Django's cache. Anything that
+changes what the list shows (profile updates, signups) replaces the
+generation. The TTL (USER_LIST_CACHE_TTL) also covers each worker's hobby
+index going stale.
+
+Enabled by USER_LIST_CACHE_SIZE > 0.
+"""
+from django.db import transaction
+
+from .caching import LRUCache, acurrent_stamp, current_stamp, replace_stamps, setting
+
+GENERATION_KEY = 'user-list:generation'
+
+user_list_cache = LRUCache(setting('USER_LIST_CACHE_SIZE'), setting('USER_LIST_CACHE_TTL', 60))
+
+
+def user_list_generation() -> int:
+    return current_stamp(GENERATION_KEY)
+
+
+async def auser_list_generation() -> int:
+    """Async equivalent of user_list_generation()."""
+    return await acurrent_stamp(GENERATION_KEY)
+
+
+def invalidate_user_list() -> None:
+    """Call after changing anything /api/users/ shows; takes effect on commit."""
+    if user_list_cache.enabled:
+        transaction.on_commit(lambda: replace_stamps([GENERATION_KEY]))
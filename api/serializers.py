@@ -1,8 +1,17 @@
 # api/serializers.py
 
+from collections import defaultdict
+from typing import Iterable, List, Optional
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import CustomUser, Hobby, FriendRequest
+from django.db import transaction
+from django.db.models import F, Manager, QuerySet
+from .models import CustomUser, Hobby, FriendRequest, Friendship
+from .catalogue import invalidate_hobby_catalogue
+from .auth import invalidate_users
+from .counters import touch
+from .result_cache import invalidate_user_list
 
 User = get_user_model()
 
@@ -12,18 +21,62 @@ class HobbySerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 
+def prefetch_hobby_names(users: Iterable[CustomUser]) -> List[CustomUser]:
+    """
+    Load the hobby names of every user in one values_list query and attach
+    them as `hobby_names`, so serializing a page of users does not cost one
+    hobbies query per user.
+    """
+    users = list(users)
+    names = defaultdict(list)
+    for user_id, hobby_name in _hobby_name_rows(users):
+        names[user_id].append(hobby_name)
+    for user in users:
+        user.hobby_names = names[user.pk]
+    return users
+
+
+async def aprefetch_hobby_names(users: Iterable[CustomUser]) -> List[CustomUser]:
+    """Async equivalent of prefetch_hobby_names()."""
+    users = list(users)
+    names = defaultdict(list)
+    async for user_id, hobby_name in _hobby_name_rows(users):
+        names[user_id].append(hobby_name)
+    for user in users:
+        user.hobby_names = names[user.pk]
+    return users
+
+
+def _hobby_name_rows(users: List[CustomUser]):
+    return CustomUser.hobbies.through.objects.filter(
+        customuser_id__in=[user.pk for user in users]
+    ).order_by('pk').values_list('customuser_id', 'hobby__name')
+
+
+class UserListSerializer(serializers.ListSerializer):
+    """
+    Used for UserSerializer(many=True): stitches hobbies in before serializing.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, (Manager, QuerySet)) else list(data)
+        if 'hobbies' in self.child.fields and not all(hasattr(user, 'hobby_names') for user in iterable):
+            iterable = prefetch_hobby_names(iterable)
+        return super().to_representation(iterable)
+
+
 class UserSerializer(serializers.ModelSerializer):
     """
     Serialises our CustomUser, including date_of_birth and hobbies,
     plus how many hobbies in common with the requesting user (if annotated).
+
+    Pass `fields=[...]` to serialise only a subset of the fields.
     """
-    hobbies = serializers.SlugRelatedField(
-        many=True,
-        read_only=True,
-        slug_field='name'
+    hobbies = serializers.SerializerMethodField()
+    # The ranking score set by user_list_view, 0 wherever it isn't annotated
+    common_hobbies = serializers.IntegerField(
+        source='common_hobbies_count', read_only=True, default=0
     )
-    # We'll allow an integer field for common hobbies
-    common_hobbies = serializers.IntegerField(read_only=True, default=0)
 
     class Meta:
         model = CustomUser
@@ -36,6 +89,40 @@ class UserSerializer(serializers.ModelSerializer):
             'hobbies',
             'common_hobbies',
         ]
+        list_serializer_class = UserListSerializer
+
+    def __init__(self, *args, fields: Optional[Iterable[str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    def get_hobbies(self, obj: CustomUser) -> List[str]:
+        names = getattr(obj, 'hobby_names', None)
+        if names is None:
+            names = prefetch_hobby_names([obj])[0].hobby_names
+        return names
+
+
+class CurrentUserSerializer(UserSerializer):
+    """
+    The logged-in user's own profile, plus their friend and pending-request
+    counts read straight from the denormalised counter columns.
+    """
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ['friend_count', 'pending_count']
+
+
+class SuggestedUserSerializer(UserSerializer):
+    """
+    A "people you may know" candidate, with why they were suggested.
+    """
+    mutual_friends = serializers.IntegerField(read_only=True)
+    score = serializers.IntegerField(read_only=True)
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ['mutual_friends', 'score']
 
 
 class UserUpdateSerializer(serializers.ModelSerializer):
@@ -56,33 +143,72 @@ class UserUpdateSerializer(serializers.ModelSerializer):
             'email', 'date_of_birth', 'hobbies'
         ]
 
+    @staticmethod
+    def upsert_hobbies(names: List[str]) -> List[Hobby]:
+        """
+        Fetch the hobbies with these names, creating any that are missing, in
+        at most three queries however many names there are.
+        """
+        names = list(dict.fromkeys(names))
+        hobbies = list(Hobby.objects.filter(name__in=names))
+        missing = set(names) - {hobby.name for hobby in hobbies}
+        if missing:
+            Hobby.objects.bulk_create(
+                [Hobby(name=name) for name in names if name in missing],
+                ignore_conflicts=True,
+            )
+            # bulk_create with ignore_conflicts leaves pks unset, so re-fetch
+            hobbies = list(Hobby.objects.filter(name__in=names))
+            invalidate_hobby_catalogue()
+        return hobbies
+
     def validate_username(self, value):
         """Ensure the username is unique if changed."""
         if CustomUser.objects.filter(username=value).exclude(pk=self.instance.pk).exists():
             raise serializers.ValidationError("Username already taken.")
         return value
 
+    @transaction.atomic
     def update(self, instance: CustomUser, validated_data: dict) -> CustomUser:
         # Handle hobbies by name
         hobbies_data = validated_data.pop('hobbies', [])
         if hobbies_data:
-            hobbies = []
-            for hobby_name in hobbies_data:
-                hobby, created = Hobby.objects.get_or_create(name=hobby_name)
-                hobbies.append(hobby)
+            hobbies = self.upsert_hobbies(hobbies_data)
+            # m2m_changed updates the similarity index once this commits
             instance.hobbies.set(hobbies)
 
-        # Update the password if provided
+        # Only columns whose value actually changes are written
+        changed = []
+
+        # Update the password if provided; hashing is the expensive part, so
+        # it only happens when a new password is sent
         password = validated_data.pop('password', None)
         if password:
             instance.set_password(password)
+            changed.append('password')
 
         # Update the username if provided
         username = validated_data.pop('username', None)
-        if username:
+        if username and username != instance.username:
             instance.username = username
-
-        return super().update(instance, validated_data)
+            changed.append('username')
+
+        for field, value in validated_data.items():
+            if getattr(instance, field) != value:
+                setattr(instance, field, value)
+                changed.append(field)
+
+        if changed or hobbies_data:
+            # The new version invalidates every ETag this profile is part of:
+            # the user's own views and their friends' friend lists
+            instance.version = F('version') + 1
+            instance.save(update_fields=changed + ['version'])
+            instance.refresh_from_db(fields=['version'])
+            invalidate_users([instance.pk])
+            invalidate_user_list()
+            touch(Friendship.objects.filter(user=instance).values_list('friend_id', flat=True))
+        self.changed_fields = changed
+        return instance
 
 
 class FriendRequestSerializer(serializers.ModelSerializer):
@@ -0,0 +1,439 @@
+"""
+Hobby similarity index used to rank users by how many hobbies they share.
+
+Instead of annotating every CustomUser with a Count() over the hobbies M2M
+table on each request, we keep an in-process inverted index from hobby id to
+the sorted ids of the users that picked it. Ranking a user merges their
+hobbies' id arrays, so it only touches users sharing at least one hobby, and
+the result is kept per user until the index next changes.
+"""
+import bisect
+import heapq
+import threading
+import time
+from array import array
+from collections import defaultdict
+from itertools import accumulate, groupby
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import IntegerField, Value
+
+from .caching import LRUCache, acurrent_stamp, current_stamp, replace_stamps, setting
+
+STAMP_KEY = 'hobby-index:stamp'
+
+# (user_id, hobby_id) rows of the hobbies M2M table
+Links = Iterable[Tuple[int, int]]
+
+# Most ids sent in one `pk IN (...)`, below SQLite's historical limit of 999
+# bound parameters per statement
+MAX_CHUNK = 900
+
+
+class Ranking:
+    """
+    The users sharing hobbies with one user: (common, ids) tiers, most hobbies
+    in common first and ids ascending within a tier. `hobby_ids` are the
+    user's own hobbies as the index saw them.
+    """
+
+    def __init__(self, hobby_ids: FrozenSet[int], tiers: List[Tuple[int, array]]):
+        self.hobby_ids = hobby_ids
+        self.tiers = tiers
+        self._ends = list(accumulate(len(ids) for _, ids in tiers))
+
+    def __len__(self) -> int:
+        return self._ends[-1] if self._ends else 0
+
+    def rows(self, start: int, stop: int) -> List[Tuple[int, int]]:
+        """(user_id, common_hobbies) pairs at positions start to stop."""
+        rows = []
+        tier = bisect.bisect_right(self._ends, start)
+        while tier < len(self.tiers) and start < stop:
+            common, ids = self.tiers[tier]
+            offset = start - (self._ends[tier] - len(ids))
+            part = ids[offset:offset + stop - start]
+            rows += [(uid, common) for uid in part]
+            start += len(part)
+            tier += 1
+        return rows
+
+    def position_after(self, common: int, last_id: int) -> int:
+        """Position of the first user that sorts after (common, last_id)."""
+        for tier, (tier_common, ids) in enumerate(self.tiers):
+            tier_start = self._ends[tier] - len(ids)
+            if tier_common < common:
+                return tier_start
+            if tier_common == common:
+                return tier_start + bisect.bisect_right(ids, last_id)
+        return len(self)
+
+
+class HobbySimilarityIndex:
+    """
+    hobby id -> sorted array of user ids, plus the reverse user id -> hobby
+    ids mapping so that single hobby links can be added and removed in place.
+
+    The index is loaded lazily from the M2M table on first use. It is reloaded
+    when the stamp under STAMP_KEY in Django's cache no longer matches the one
+    it was built (or last updated) under, which any hobby write through the
+    ORM replaces on commit (see hobbies_changed), or after `ttl` seconds for
+    writes nothing saw. Only one thread reloads at a time; the others keep
+    reading the old index.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, ranking_cache_size=64):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self._hobby_users: Dict[int, array] = {}
+        self._user_hobbies: Dict[int, FrozenSet[int]] = {}
+        self._built_at: Optional[float] = None
+        self._stamp = None
+        # Bumped on every change, so cached rankings from before stop matching
+        self._generation = 0
+        self._rankings = LRUCache(ranking_cache_size)
+        # Changes made while a rebuild is loading, replayed onto its result
+        self._pending: Optional[List[Tuple[Links, Links]]] = None
+
+    def _is_fresh(self, stamp) -> bool:
+        if self._built_at is None or stamp != self._stamp:
+            return False
+        return self.ttl is None or time.monotonic() - self._built_at < self.ttl
+
+    def ensure_fresh(self, stamp=None) -> None:
+        """Rebuild if stale, unless another thread already is."""
+        if stamp is None:
+            stamp = current_stamp(STAMP_KEY)
+        if self._is_fresh(stamp):
+            return
+        if self._built_at is None:
+            # Nothing to serve meanwhile, so wait for whoever is loading
+            with self._rebuild_lock:
+                if not self._is_fresh(stamp):
+                    self._rebuild()
+        elif self._rebuild_lock.acquire(blocking=False):
+            try:
+                if not self._is_fresh(stamp):
+                    self._rebuild()
+            finally:
+                self._rebuild_lock.release()
+
+    def rebuild(self) -> None:
+        """Load the whole index from the hobbies M2M table in one query."""
+        with self._rebuild_lock:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        from .models import CustomUser
+
+        # Read first: a write committed during the load replaces it, and the
+        # next read reloads again
+        stamp = current_stamp(STAMP_KEY)
+        with self._lock:
+            self._pending = []
+        try:
+            hobby_users: Dict[int, List[int]] = defaultdict(list)
+            user_hobbies: Dict[int, set] = defaultdict(set)
+            # From the primary even inside a replica-routed request: pages
+            # check the index against their own database, which may only lag
+            rows = CustomUser.hobbies.through.objects.using(DEFAULT_DB_ALIAS).values_list('customuser_id', 'hobby_id')
+            for user_id, hobby_id in rows.iterator(chunk_size=5000):
+                hobby_users[hobby_id].append(user_id)
+                user_hobbies[user_id].add(hobby_id)
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self._hobby_users = {hid: array('q', sorted(uids)) for hid, uids in hobby_users.items()}
+            self._user_hobbies = {uid: frozenset(hids) for uid, hids in user_hobbies.items()}
+            pending, self._pending = self._pending, None
+            for added, removed in pending:
+                self._apply(added, removed)
+            self._built_at = time.monotonic()
+            self._stamp = stamp
+            self._generation += 1
+
+    def update(self, added: Links = (), removed: Links = ()) -> None:
+        """
+        Apply committed (user_id, hobby_id) links in place and replace the
+        stamp, so every other worker reloads while this one stays current.
+        """
+        added, removed = list(added), list(removed)
+        seen = current_stamp(STAMP_KEY)
+        stamp = replace_stamps([STAMP_KEY])
+        with self._lock:
+            if self._pending is not None:
+                # The rebuild's query may have run before this change
+                self._pending.append((added, removed))
+            if self._built_at is None:
+                # Nothing loaded yet; the first read picks the change up.
+                return
+            self._apply(added, removed)
+            self._generation += 1
+            if self._stamp == seen:
+                # Nobody else wrote since this index was last in step
+                self._stamp = stamp
+
+    def invalidate(self) -> None:
+        """Make every worker, this one included, reload on its next read."""
+        replace_stamps([STAMP_KEY])
+
+    def _apply(self, added: Links, removed: Links) -> None:
+        for user_id, hobby_id in removed:
+            users = self._hobby_users.get(hobby_id)
+            if users is not None:
+                i = bisect.bisect_left(users, user_id)
+                if i < len(users) and users[i] == user_id:
+                    del users[i]
+                if not users:
+                    del self._hobby_users[hobby_id]
+            hobby_ids = self._user_hobbies.get(user_id, frozenset()) - {hobby_id}
+            if hobby_ids:
+                self._user_hobbies[user_id] = hobby_ids
+            else:
+                self._user_hobbies.pop(user_id, None)
+        for user_id, hobby_id in added:
+            users = self._hobby_users.setdefault(hobby_id, array('q'))
+            i = bisect.bisect_left(users, user_id)
+            if i == len(users) or users[i] != user_id:
+                users.insert(i, user_id)
+            self._user_hobbies[user_id] = self._user_hobbies.get(user_id, frozenset()) | {hobby_id}
+
+    def ranked(self, user_id: int) -> Ranking:
+        """
+        The users sharing at least one hobby with `user_id`, best match
+        first, ties broken by id.
+        """
+        self.ensure_fresh()
+        return self._ranking(user_id)
+
+    async def aranked(self, user_id: int) -> Ranking:
+        """
+        Async equivalent of ranked(). Only a reload needs the database, so
+        only then does it go through sync_to_async.
+        """
+        stamp = await acurrent_stamp(STAMP_KEY)
+        reloading = self._built_at is not None and self._rebuild_lock.locked()
+        if not self._is_fresh(stamp) and not reloading:
+            await sync_to_async(self.ensure_fresh)(stamp)
+        return self._ranking(user_id)
+
+    def _ranking(self, user_id: int) -> Ranking:
+        with self._lock:
+            generation = self._generation
+            ranking = self._rankings.get(user_id, generation)
+            if ranking is None:
+                ranking = self._rank(user_id)
+                self._rankings.put(user_id, ranking, generation)
+        return ranking
+
+    def _rank(self, user_id: int) -> Ranking:
+        hobby_ids = self._user_hobbies.get(user_id, frozenset())
+        # Each array is sorted, so merging them brings every user's shared
+        # hobbies together, and each tier fills in id order
+        merged = heapq.merge(*(self._hobby_users.get(hobby_id, ()) for hobby_id in hobby_ids))
+        by_common: Dict[int, array] = defaultdict(lambda: array('q'))
+        for uid, group in groupby(merged):
+            if uid != user_id:
+                by_common[sum(1 for _ in group)].append(uid)
+        tiers = [(common, by_common[common]) for common in sorted(by_common, reverse=True)]
+        return Ranking(hobby_ids, tiers)
+
+
+class RankedUserList:
+    """
+    A sliceable, countable list of users ordered by common hobbies (desc) and
+    then id, so it can be handed straight to django's Paginator.
+
+    Users sharing hobbies come from the Ranking, read in bounded chunks from
+    the start of the page on; everyone else follows in id order with a count
+    of 0, selected by a subquery on the hobbies table rather than a list of
+    ids. The ranked ids are loaded through that same subquery, so a user the
+    index still lists after losing their shared hobbies is only shown among
+    the rest, never twice. Each object gets a `common_hobbies_count`
+    attribute, matching the old queryset annotation.
+    """
+
+    def __init__(self, queryset, ranking: Ranking):
+        self.queryset = queryset
+        self.ranking = ranking
+        self._count: Optional[int] = None
+
+    def count(self) -> int:
+        if self._count is None:
+            self._count = self.queryset.count()
+        return self._count
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError('RankedUserList only supports slicing')
+        start = key.start or 0
+        stop = key.stop if key.stop is not None else self.count()
+
+        ranked_count = self._ranked().count() if start else 0
+        if start and start >= ranked_count:
+            # The page lies wholly among the users sharing no hobbies
+            users, tail_start = [], start - ranked_count
+        else:
+            users, tail_start = self._head(0, start, stop - start), 0
+        remaining = stop - start - len(users)
+        if remaining > 0:
+            users += self._tail()[tail_start:tail_start + remaining]
+        return users
+
+    async def acount(self) -> int:
+        if self._count is None:
+            self._count = await self.queryset.acount()
+        return self._count
+
+    async def aslice(self, start: int, stop: int) -> list:
+        """Async equivalent of self[start:stop]."""
+        ranked_count = await self._ranked().acount() if start else 0
+        if start and start >= ranked_count:
+            users, tail_start = [], start - ranked_count
+        else:
+            users, tail_start = await self._ahead(0, start, stop - start), 0
+        remaining = stop - start - len(users)
+        if remaining > 0:
+            users += [user async for user in self._tail()[tail_start:tail_start + remaining]]
+        return users
+
+    def _keyset_start(self, common: Optional[int], last_id: Optional[int]) -> int:
+        if common is None:
+            return 0
+        return self.ranking.position_after(common, last_id)
+
+    def _keyset_tail(self, common: Optional[int], last_id: Optional[int]):
+        tail = self._tail()
+        if common == 0:
+            tail = tail.filter(pk__gt=last_id)
+        return tail
+
+    def after(self, common: Optional[int], last_id: Optional[int], limit: int) -> list:
+        """
+        Keyset slice: up to `limit` users that sort after (common, last_id), or
+        from the start when no key is given. Never counts the queryset.
+        """
+        users = self._head(self._keyset_start(common, last_id), 0, limit)
+        remaining = limit - len(users)
+        if remaining > 0:
+            users += self._keyset_tail(common, last_id)[:remaining]
+        return users
+
+    async def aafter(self, common: Optional[int], last_id: Optional[int], limit: int) -> list:
+        """Async equivalent of after()."""
+        users = await self._ahead(self._keyset_start(common, last_id), 0, limit)
+        remaining = limit - len(users)
+        if remaining > 0:
+            users += [user async for user in self._keyset_tail(common, last_id)[:remaining]]
+        return users
+
+    def _head(self, position: int, skip: int, limit: int) -> list:
+        """
+        Up to `limit` ranked users in the queryset, reading the ranking from
+        `position` on and passing over the first `skip` of them.
+        """
+        users = []
+        size = skip + limit
+        while len(users) < limit and position < len(self.ranking):
+            size = min(size, MAX_CHUNK)
+            rows = self.ranking.rows(position, position + size)
+            position += size
+            if skip:
+                present = set(self._present(rows))
+                rows = [row for row in rows if row[0] in present]
+                skip, rows = max(0, skip - len(rows)), rows[skip:]
+            users += self._load(rows[:limit - len(users)])
+            size *= 2
+        return users
+
+    async def _ahead(self, position: int, skip: int, limit: int) -> list:
+        """Async equivalent of _head()."""
+        users = []
+        size = skip + limit
+        while len(users) < limit and position < len(self.ranking):
+            size = min(size, MAX_CHUNK)
+            rows = self.ranking.rows(position, position + size)
+            position += size
+            if skip:
+                present = {pk async for pk in self._present(rows)}
+                rows = [row for row in rows if row[0] in present]
+                skip, rows = max(0, skip - len(rows)), rows[skip:]
+            users += await self._aload(rows[:limit - len(users)])
+            size *= 2
+        return users
+
+    def _present(self, rows: List[Tuple[int, int]]):
+        return self._ranked().filter(pk__in=[uid for uid, _ in rows]).values_list('pk', flat=True)
+
+    @staticmethod
+    def _annotate(head: List[Tuple[int, int]], by_id: dict) -> list:
+        users = []
+        for uid, common in head:
+            user = by_id.get(uid)
+            if user is not None:
+                user.common_hobbies_count = common
+                users.append(user)
+        return users
+
+    def _load(self, head: List[Tuple[int, int]]) -> list:
+        return self._annotate(head, self._ranked().in_bulk([uid for uid, _ in head]))
+
+    async def _aload(self, head: List[Tuple[int, int]]) -> list:
+        return self._annotate(head, await self._ranked().ain_bulk([uid for uid, _ in head]))
+
+    def _sharing(self):
+        """Subquery of the ids of users sharing any of the ranked user's hobbies."""
+        through = self.queryset.model.hobbies.through
+        return through.objects.filter(hobby_id__in=self.ranking.hobby_ids).values('customuser_id')
+
+    def _ranked(self):
+        """The queryset's users that the ranking covers."""
+        if not self.ranking:
+            return self.queryset.none()
+        return self.queryset.filter(pk__in=self._sharing())
+
+    def _tail(self):
+        """Users sharing no hobbies, in id order."""
+        tail = self.queryset
+        if self.ranking:
+            tail = tail.exclude(pk__in=self._sharing())
+        return tail.order_by('pk').annotate(common_hobbies_count=Value(0, output_field=IntegerField()))
+
+
+similarity_index = HobbySimilarityIndex(
+    ttl=getattr(settings, 'HOBBY_INDEX_TTL', 300),
+    ranking_cache_size=setting('HOBBY_RANKING_CACHE_SIZE', 64),
+)
+
+
+def hobbies_changed(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """
+    m2m_changed receiver for CustomUser.hobbies, from either side. Applies the
+    links to this worker's index and replaces the stamp once committed.
+    """
+    if action == 'post_clear':
+        transaction.on_commit(similarity_index.invalidate, using=using)
+    elif action in ('post_add', 'post_remove') and pk_set:
+        if reverse:
+            links = [(user_id, instance.pk) for user_id in pk_set]
+        else:
+            links = [(instance.pk, hobby_id) for hobby_id in pk_set]
+        if action == 'post_add':
+            transaction.on_commit(lambda: similarity_index.update(added=links), using=using)
+        else:
+            transaction.on_commit(lambda: similarity_index.update(removed=links), using=using)
+
+
+def hobby_rows_deleted(sender, using, **kwargs):
+    """post_delete receiver for CustomUser and Hobby, whose links cascade silently."""
+    transaction.on_commit(similarity_index.invalidate, using=using)
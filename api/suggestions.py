@@ -0,0 +1,122 @@
+"""
+"People you may know" candidate generation.
+
+Walking the friendship graph per request does not scale, so build_suggestions()
+runs as a periodic batch job (manage.py build_suggestions). It loads the whole
+Friendship table and the hobbies M2M table once as sorted integer arrays.
+Each user's candidates are their friends-of-friends, scored by mutual friends
+plus shared hobbies, and the top K per user are stored in FriendSuggestion,
+which the suggestions endpoint reads with one indexed query. Shared hobbies
+only score: a popular hobby would otherwise make nearly everyone a candidate.
+"""
+import heapq
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+
+# A mutual friend counts for this many shared hobbies
+MUTUAL_FRIEND_WEIGHT = 3
+DEFAULT_TOP_K = 20
+
+
+def _adjacency(rows: Iterable[Tuple[int, int]]) -> Dict[int, array]:
+    """Group (key, value) rows into sorted, compact int64 arrays per key."""
+    grouped = defaultdict(list)
+    for key, value in rows:
+        grouped[key].append(value)
+    return {key: array('q', sorted(values)) for key, values in grouped.items()}
+
+
+def common_count(a: Sequence[int], b: Sequence[int]) -> int:
+    """Size of the intersection of two sorted, duplicate-free sequences."""
+    i = j = common = 0
+    while i < len(a) and j < len(b):
+        if a[i] < b[j]:
+            i += 1
+        elif a[i] > b[j]:
+            j += 1
+        else:
+            common += 1
+            i += 1
+            j += 1
+    return common
+
+
+def score_candidates(
+    user_id: int,
+    friends: Dict[int, array],
+    hobbies: Dict[int, array],
+    excluded: Iterable[int] = (),
+    top_k: int = DEFAULT_TOP_K,
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Return up to top_k (candidate_id, score, mutual_friends, common_hobbies)
+    tuples for one user's friends-of-friends, best first, ties broken by
+    candidate id.
+    """
+    my_friends = friends.get(user_id, array('q'))
+
+    # Counting friends-of-friends gives |friends(me) & friends(candidate)|
+    mutual: Counter = Counter()
+    for friend_id in my_friends:
+        mutual.update(friends.get(friend_id, ()))
+
+    skip = set(my_friends)
+    skip.update(excluded)
+    skip.add(user_id)
+
+    my_hobbies = hobbies.get(user_id, array('q'))
+    common = {
+        candidate: common_count(my_hobbies, hobbies.get(candidate, ()))
+        for candidate in mutual
+        if candidate not in skip
+    }
+    scored = (
+        (mutual[candidate] * MUTUAL_FRIEND_WEIGHT + shared, -candidate)
+        for candidate, shared in common.items()
+    )
+    best = heapq.nlargest(top_k, scored)
+    return [(-neg_id, score, mutual[-neg_id], common[-neg_id]) for score, neg_id in best]
+
+
+def build_suggestions(top_k: int = DEFAULT_TOP_K, batch_size: int = 1000, user_ids: Optional[List[int]] = None) -> int:
+    """
+    Recompute FriendSuggestion rows for every user (or just `user_ids`).
+    Returns the number of rows written.
+    """
+    from .models import CustomUser, FriendRequest, FriendSuggestion, Friendship
+
+    friends = _adjacency(Friendship.objects.values_list('user_id', 'friend_id').iterator(chunk_size=10000))
+    hobbies = _adjacency(CustomUser.hobbies.through.objects.values_list('customuser_id', 'hobby_id').iterator(chunk_size=10000))
+    # Anyone with a request already open between the two is not a suggestion
+    pending = defaultdict(set)
+    for from_id, to_id in FriendRequest.objects.filter(accepted=False).values_list('from_user_id', 'to_user_id').iterator(chunk_size=10000):
+        pending[from_id].add(to_id)
+        pending[to_id].add(from_id)
+
+    if user_ids is None:
+        user_ids = list(CustomUser.objects.order_by('pk').values_list('pk', flat=True))
+
+    written = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        rows = [
+            FriendSuggestion(
+                user_id=user_id,
+                candidate_id=candidate_id,
+                score=score,
+                mutual_friends=mutual_friends,
+                common_hobbies=common_hobbies,
+            )
+            for user_id in batch
+            for candidate_id, score, mutual_friends, common_hobbies in score_candidates(
+                user_id, friends, hobbies, pending.get(user_id, ()), top_k
+            )
+        ]
+        with transaction.atomic():
+            FriendSuggestion.objects.filter(user_id__in=batch).delete()
+            FriendSuggestion.objects.bulk_create(rows, batch_size=5000)
+        written += len(rows)
+    return written
@@ -10,11 +10,16 @@ from .views import (
 from .views_api import (
     user_list_view,
     user_detail_view,
+    user_suggestions_view,
     friend_request_view,
+    friend_request_bulk_view,
     hobby_list_create_view,
     current_user_view,
     current_user_friends_view,
+    bootstrap_view,
+    metrics_view,
 )
+from . import views_async
 
 urlpatterns = [
     # SSR routes
@@ -27,8 +32,18 @@ urlpatterns = [
     path('api/users/', user_list_view, name='user-list'),
     path('api/users/<int:user_id>/', user_detail_view, name='user-detail'),
     path('api/users/current/', current_user_view, name='current-user'),
+    path('api/users/suggestions/', user_suggestions_view, name='user-suggestions'),
     path('api/friend-requests/', friend_request_view, name='friend-request'),
+    path('api/friend-requests/bulk/', friend_request_bulk_view, name='friend-request-bulk'),
     path('api/hobbies/', hobby_list_create_view, name='hobbies-view'),
     path('api/users/current/friends/', current_user_friends_view, name='current-user-friends'),
+    path('api/bootstrap/', bootstrap_view, name='bootstrap'),
+    path('api/metrics/', metrics_view, name='metrics'),
+
+    # Async (ASGI-native) read endpoints, same responses as their sync twins
+    path('api/async/users/', views_async.user_list_view, name='user-list-async'),
+    path('api/async/users/current/', views_async.current_user_view, name='current-user-async'),
+    path('api/async/users/current/friends/', views_async.current_user_friends_view, name='current-user-friends-async'),
+    path('api/async/hobbies/', views_async.hobby_list_view, name='hobbies-view-async'),
 
 ]
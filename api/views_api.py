@@ -1,39 +1,165 @@
-from datetime import date, timedelta
-from django.db.models import Q, Count
+import json
+from datetime import datetime
+from django.conf import settings
+from django.contrib.auth import update_session_auth_hash
+from django.db import transaction
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
-from .models import CustomUser, Hobby, FriendRequest
+from .models import CustomUser, Hobby, FriendRequest, FriendSuggestion, Friendship
 from .serializers import (
     UserSerializer,
+    CurrentUserSerializer,
+    SuggestedUserSerializer,
     UserUpdateSerializer,
     HobbySerializer,
-    FriendRequestSerializer
+    FriendRequestSerializer,
+    prefetch_hobby_names,
 )
+from .similarity import similarity_index, RankedUserList
+from .pagination import encode_cursor, decode_cursor, InvalidCursor
+from .catalogue import catalogue_etag, hobby_catalogue, invalidate_hobby_catalogue
+from .metrics import registry as metrics_registry, timed
+from .counters import bump
+from .filters import filter_by_age, parse_age
+from .result_cache import user_list_cache, user_list_generation
 
 
 # views_api.py
 
+USERS_PER_PAGE = 10
+
+
+def parse_user_cursor(cursor):
+    """
+    Decode a user-list cursor into (common_hobbies_count, id), or
+    (None, None) for the first page. Raises InvalidCursor.
+    """
+    key = decode_cursor(cursor, 2)
+    if key and not all(isinstance(value, int) for value in key):
+        raise InvalidCursor(cursor)
+    return key if key else (None, None)
+
+
+def keyset_page(users):
+    """
+    Trim a USERS_PER_PAGE + 1 keyset slice to one page and build next_cursor
+    (None on the last page).
+    """
+    if len(users) <= USERS_PER_PAGE:
+        return users, None
+    users = users[:USERS_PER_PAGE]
+    last = users[-1]
+    return users, encode_cursor(last.common_hobbies_count, last.pk)
+
+
+def requested_fields(request):
+    """
+    Parse the `?fields=` sparse-fieldset parameter into a list of field
+    names, or None when the client wants every field.
+    """
+    fields = request.GET.get('fields')
+    if not fields:
+        return None
+    return [name.strip() for name in fields.split(',') if name.strip()]
+
+
+def user_etag(kind, user):
+    """
+    ETag of a `kind` payload built from `user`'s data, which changes with
+    CustomUser.version, so it can be checked before running any query.
+    """
+    return '"{}-{}-{}"'.format(kind, user.pk, user.version)
+
+
+def etag_matches(request, etag):
+    """Whether the client's If-None-Match already names `etag`."""
+    header = request.headers.get('If-None-Match', '')
+    return etag in (tag.strip() for tag in header.split(','))
+
+
+def not_modified(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+
+def user_list_cache_key(request, user, fields):
+    """Key of a /api/users/ page in user_list_cache, shared with views_async."""
+    return (
+        user.pk,
+        user.version,
+        parse_age(request.GET.get('min_age')),
+        parse_age(request.GET.get('max_age')),
+        str(request.GET.get('page', 1)),
+        request.GET.get('cursor'),
+        tuple(fields) if fields is not None else None,
+    )
+
+
+def pending_friend_requests(user):
+    """The user's unanswered friend requests, oldest first."""
+    # Served by the partial pending-inbox index
+    return FriendRequest.objects.filter(
+        to_user=user,
+        accepted=False
+    ).select_related('from_user', 'to_user').order_by('created_at', 'pk')
+
+
+def dashboard_payload(user):
+    """
+    Everything the SPA's main page shows: the user, their pending friend
+    requests and their friends. Three queries however many of each there are,
+    as the hobbies of the user and every friend are loaded together.
+    """
+    friend_requests = list(pending_friend_requests(user))
+    friends = list(user.friends())
+    prefetch_hobby_names([user] + friends)
+    return {
+        'current_user': CurrentUserSerializer(user).data,
+        'friend_requests': FriendRequestSerializer(friend_requests, many=True).data,
+        'friends': UserSerializer(friends, many=True).data,
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def bootstrap_view(request):
+    """
+    Returns current_user_view, the pending friend requests from
+    friend_request_view and current_user_friends_view in one response.
+    """
+    return Response(dashboard_payload(request.user))
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def current_user_friends_view(request):
+    # Friending and friends' profile updates both bump request.user.version
+    etag = user_etag('friends', request.user)
+    if etag_matches(request, etag):
+        return not_modified(etag)
     friends_qs = request.user.friends()
     serializer = UserSerializer(friends_qs, many=True)
-    return Response(serializer.data)
+    return Response(serializer.data, headers={'ETag': etag})
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def current_user_view(request):
     """
-    Returns the currently authenticated user's details.
+    Returns the currently authenticated user's details, or 304 when the
+    client's If-None-Match is still current.
     """
     user = request.user
-    serializer = UserSerializer(user)
-    return Response(serializer.data)
+    etag = user_etag('current', user)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    serializer = CurrentUserSerializer(user)
+    return Response(serializer.data, headers={'ETag': etag})
 
 
 @api_view(['GET', 'POST'])
@@ -43,15 +169,22 @@ def hobby_list_create_view(request):
     Handles fetching all hobbies or creating a new one.
     """
     if request.method == 'GET':
-        hobbies = Hobby.objects.all()
-        serializer = HobbySerializer(hobbies, many=True)
-        return Response({'hobbies': serializer.data})
+        # Only the small ETag entry is read when the client is up to date
+        etag = catalogue_etag()
+        if etag is not None and etag_matches(request, etag):
+            return not_modified(etag)
+        etag, hobbies = hobby_catalogue()
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return Response({'hobbies': hobbies}, headers={'ETag': etag})
 
     elif request.method == 'POST':
         hobby_name = request.data.get('hobby_name')
         if not hobby_name:
             return Response({'error': 'No hobby name provided'}, status=status.HTTP_400_BAD_REQUEST)
         hobby_obj, created = Hobby.objects.get_or_create(name=hobby_name)
+        if created:
+            invalidate_hobby_catalogue()
         response_data = HobbySerializer(hobby_obj).data
         if created:
             return Response({'message': 'Hobby created', 'hobby': response_data}, status=status.HTTP_201_CREATED)
@@ -65,58 +198,105 @@ def user_list_view(request):
     """
     Fetch a paginated list of users, optionally filtered by age range,
     ordered by how many hobbies they have in common with the logged-in user.
+    Pass `?cursor=` (empty for the first page) to page by next_cursor instead
+    of page numbers, and `?fields=id,name,...` to return only some fields.
+    Successful results are kept in user_list_cache when it is enabled.
     """
-    today = date.today()
-    min_age_str = request.GET.get('min_age')
-    max_age_str = request.GET.get('max_age')
     page_str = request.GET.get('page', 1)
-
-    users_qs = CustomUser.objects.exclude(pk=request.user.pk)
-
-    # Filter by minimum age
-    if min_age_str:
+    fields = requested_fields(request)
+
+    cache_key = generation = None
+    if user_list_cache.enabled:
+        generation = user_list_generation()
+        cache_key = user_list_cache_key(request, request.user, fields)
+        cached = user_list_cache.get(cache_key, generation)
+        if cached is not None:
+            return Response(cached)
+
+    users_qs = filter_by_age(
+        CustomUser.objects.exclude(pk=request.user.pk),
+        request.GET.get('min_age'),
+        request.GET.get('max_age'),
+    )
+
+    # Rank by shared hobbies using the precomputed index rather than
+    # annotating and sorting the whole user table
+    users_list = RankedUserList(users_qs, similarity_index.ranked(request.user.pk))
+
+    # Opt-in keyset mode: no COUNT(*) and no OFFSET, just a next_cursor
+    if 'cursor' in request.GET:
         try:
-            min_age = int(min_age_str)
-            min_birth_date = today - timedelta(days=min_age * 365)
-            users_qs = users_qs.filter(date_of_birth__lte=min_birth_date)
-        except ValueError:
-            pass
-
-    # Filter by maximum age
-    if max_age_str:
-        try:
-            max_age = int(max_age_str)
-            max_birth_date = today - timedelta(days=max_age * 365)
-            users_qs = users_qs.filter(date_of_birth__gte=max_birth_date)
-        except ValueError:
-            pass
-
-   
-    user_hobbies = request.user.hobbies.all()
-    users_qs = users_qs.annotate(
-        common_hobbies_count=Count(
-            'hobbies',
-            filter=Q(hobbies__in=user_hobbies),
-            distinct=True
-        )
-    ).order_by('-common_hobbies_count')
+            common, last_id = parse_user_cursor(request.GET['cursor'])
+        except InvalidCursor:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        users = users_list.after(common, last_id, USERS_PER_PAGE + 1)
+        users, next_cursor = keyset_page(users)
+        serializer = UserSerializer(users, many=True, fields=fields)
+        with timed('serialize'):
+            users_data = serializer.data
+        data = {
+            'users': users_data,
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None,
+        }
+        if cache_key is not None:
+            user_list_cache.put(cache_key, data, generation)
+        return Response(data)
 
     from django.core.paginator import Paginator
-    paginator = Paginator(users_qs, 10)  # Show 10 users per page
+    paginator = Paginator(users_list, USERS_PER_PAGE)
     try:
         page_obj = paginator.get_page(page_str)
     except ValueError:
         return Response({'error': 'Invalid page number'}, status=status.HTTP_400_BAD_REQUEST)
 
     # We want to serialize each user with their common_hobbies_count
-    serializer = UserSerializer(page_obj, many=True)
+    serializer = UserSerializer(page_obj, many=True, fields=fields)
+    with timed('serialize'):
+        users_data = serializer.data
 
-    return Response({
-        'users': serializer.data,
+    data = {
+        'users': users_data,
         'page': page_obj.number,
         'total_pages': paginator.num_pages,
         'has_next': page_obj.has_next(),
-    })
+    }
+    if cache_key is not None:
+        user_list_cache.put(cache_key, data, generation)
+    return Response(data)
+
+
+def user_suggestions(user):
+    """
+    The user's precomputed suggestions, best first, minus anyone befriended
+    or asked in either direction since the last build.
+    """
+    return FriendSuggestion.objects.filter(user=user).exclude(
+        candidate__in=Friendship.objects.filter(user=user).values('friend')
+    ).exclude(
+        candidate__in=FriendRequest.objects.filter(from_user=user, accepted=False).values('to_user')
+    ).exclude(
+        candidate__in=FriendRequest.objects.filter(to_user=user, accepted=False).values('from_user')
+    ).select_related('candidate').order_by('-score', 'candidate')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def user_suggestions_view(request):
+    """
+    "People you may know": the logged-in user's precomputed suggestions, best
+    first, each with its score, mutual friend count and shared hobby count.
+    Anyone befriended or asked since the last build is left out.
+    """
+    users = []
+    for suggestion in user_suggestions(request.user):
+        candidate = suggestion.candidate
+        candidate.common_hobbies_count = suggestion.common_hobbies
+        candidate.mutual_friends = suggestion.mutual_friends
+        candidate.score = suggestion.score
+        users.append(candidate)
+    serializer = SuggestedUserSerializer(users, many=True, fields=requested_fields(request))
+    return Response({'users': serializer.data})
 
 
 @api_view(['GET', 'PUT'])
@@ -124,17 +304,25 @@ def user_list_view(request):
 def user_detail_view(request, user_id: int):
     """
     Fetch or update a specific user's details (including optional pass/username).
+    GET answers If-None-Match with 304 before any query.
     """
+    if request.method == 'GET' and request.user.id == user_id:
+        etag = user_etag('user', request.user)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        serializer = UserSerializer(request.user)
+        with timed('serialize'):
+            data = serializer.data
+        return Response(data, headers={'ETag': etag})
+
     user_obj = get_object_or_404(CustomUser, pk=user_id)
 
     if request.method == 'GET':
-        if request.user.id != user_obj.id:
-            return HttpResponse(
-                # {'error': 'You cannot view another user’s profile.'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        serializer = UserSerializer(user_obj)
-        return Response(serializer.data)
+        # Only reached for someone else's profile
+        return HttpResponse(
+            # {'error': 'You cannot view another user’s profile.'},
+            status=status.HTTP_403_FORBIDDEN
+        )
 
     elif request.method == 'PUT':
         if request.user.id != user_obj.id:
@@ -146,24 +334,69 @@ def user_detail_view(request, user_id: int):
         serializer = UserUpdateSerializer(user_obj, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
+            if 'password' in serializer.changed_fields:
+                # Keep this session valid without re-running authenticate()
+                update_session_auth_hash(request, user_obj)
             return Response({'message': 'User updated successfully'})
         # return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+FRIEND_REQUESTS_PER_PAGE = 50
+
+
+def stream_friend_requests(friend_requests):
+    """
+    Stream friend requests as newline-delimited JSON, reading the queryset in
+    chunks so memory stays bounded however large the inbox is.
+    """
+    def rows():
+        for friend_request in friend_requests.iterator(chunk_size=FRIEND_REQUESTS_PER_PAGE * 10):
+            data = FriendRequestSerializer(friend_request).data
+            yield json.dumps(data, cls=JSONEncoder) + '\n'
+
+    return StreamingHttpResponse(rows(), content_type='application/x-ndjson')
+
+
 @api_view(['GET', 'POST', 'PUT'])
 @permission_classes([IsAuthenticated])
 def friend_request_view(request):
     """
     Handle friend requests.
     - GET: Return friend requests relevant to current user (pending).
+      `?cursor=` pages through them oldest first and `?stream=ndjson` streams
+      them all as newline-delimited JSON.
     - POST: Send a friend request.
-    - PUT: Accept a friend request.
+    - PUT: Accept a friend request. The response carries the updated
+      dashboard_payload() so the client need not re-fetch it.
     """
     if request.method == 'GET':
-        pending_requests = FriendRequest.objects.filter(
-            to_user=request.user,
-            accepted=False
-        )
+        pending_requests = pending_friend_requests(request.user)
+
+        if request.GET.get('stream') == 'ndjson':
+            return stream_friend_requests(pending_requests)
+
+        if 'cursor' in request.GET:
+            try:
+                key = decode_cursor(request.GET['cursor'], 2)
+                if key:
+                    created_at = datetime.fromisoformat(key[0])
+                    pending_requests = pending_requests.filter(
+                        Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=key[1])
+                    )
+            except (InvalidCursor, TypeError, ValueError):
+                return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+            page = list(pending_requests[:FRIEND_REQUESTS_PER_PAGE + 1])
+            next_cursor = None
+            if len(page) > FRIEND_REQUESTS_PER_PAGE:
+                page = page[:FRIEND_REQUESTS_PER_PAGE]
+                next_cursor = encode_cursor(page[-1].created_at.isoformat(), page[-1].pk)
+            serializer = FriendRequestSerializer(page, many=True)
+            return Response({
+                'friend_requests': serializer.data,
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None,
+            })
+
         serializer = FriendRequestSerializer(pending_requests, many=True)
         return Response(serializer.data)
 
@@ -178,7 +411,10 @@ def friend_request_view(request):
             return Response({'error': 'Cannot send friend request to yourself'}, status=status.HTTP_400_BAD_REQUEST)
 
         to_user = get_object_or_404(CustomUser, pk=to_user_id)
-        fr, created = FriendRequest.objects.get_or_create(from_user=from_user, to_user=to_user)
+        with transaction.atomic():
+            fr, created = FriendRequest.objects.get_or_create(from_user=from_user, to_user=to_user)
+            if created:
+                bump([to_user.pk], 'pending_count')
         if not created:
             return Response({'error': 'Friend request already exists'}, status=status.HTTP_400_BAD_REQUEST)
         return Response({'message': 'Friend request sent'}, status=status.HTTP_201_CREATED)
@@ -196,7 +432,140 @@ def friend_request_view(request):
             return Response({'error': 'Not authorised'}, status=status.HTTP_403_FORBIDDEN)
 
         if action == 'accept':
-            fr_obj.accepted = True
-            fr_obj.save()
-            return Response({'message': 'Friend request accepted'})
+            with transaction.atomic():
+                if not fr_obj.accepted:
+                    bump([fr_obj.to_user_id], 'pending_count', -1)
+                fr_obj.accepted = True
+                fr_obj.save()
+                Friendship.link(fr_obj.from_user, fr_obj.to_user)
+            request.user.refresh_from_db(fields=['friend_count', 'pending_count'])
+            return Response({'message': 'Friend request accepted', **dashboard_payload(request.user)})
         return Response({'error': 'Invalid action'}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """
+    Returns the per-endpoint request metrics and result cache statistics
+    aggregated by this worker process.
+    """
+    return Response({
+        'enabled': getattr(settings, 'REQUEST_METRICS', False),
+        'endpoints': metrics_registry.snapshot(),
+        'caches': {'user_list': user_list_cache.stats()},
+    })
+
+
+# Largest number of ids accepted by one bulk friend-request call
+FRIEND_REQUEST_BATCH_LIMIT = 500
+
+
+def parse_id_list(value):
+    """
+    Parse a JSON list of ids into a de-duplicated list of ints, or None if
+    it is missing, malformed or longer than FRIEND_REQUEST_BATCH_LIMIT.
+    """
+    if not isinstance(value, list) or not value or len(value) > FRIEND_REQUEST_BATCH_LIMIT:
+        return None
+    try:
+        return list(dict.fromkeys(int(item) for item in value))
+    except (TypeError, ValueError):
+        return None
+
+
+@api_view(['POST', 'PUT'])
+@permission_classes([IsAuthenticated])
+def friend_request_bulk_view(request):
+    """
+    Batch version of friend_request_view.
+    - POST: Send friend requests to every id in `to_user_ids`.
+    - PUT: Apply `action` to every id in `friend_request_ids`, returning the
+      updated dashboard_payload() alongside the results.
+    Each id gets its own result, so one bad id does not fail the batch.
+    """
+    if request.method == 'POST':
+        to_user_ids = parse_id_list(request.data.get('to_user_ids'))
+        if to_user_ids is None:
+            return Response(
+                {'error': f'to_user_ids must be a list of up to {FRIEND_REQUEST_BATCH_LIMIT} ids'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        existing_users = set(CustomUser.objects.filter(pk__in=to_user_ids).values_list('pk', flat=True))
+        already_sent = set(
+            FriendRequest.objects.filter(
+                from_user=request.user, to_user_id__in=to_user_ids
+            ).values_list('to_user_id', flat=True)
+        )
+
+        results = []
+        new_requests = []
+        for to_user_id in to_user_ids:
+            if to_user_id == request.user.pk:
+                result = 'Cannot send friend request to yourself'
+            elif to_user_id not in existing_users:
+                result = 'User not found'
+            elif to_user_id in already_sent:
+                result = 'Friend request already exists'
+            else:
+                result = 'Friend request sent'
+                new_requests.append(FriendRequest(from_user=request.user, to_user_id=to_user_id))
+            results.append({'to_user_id': to_user_id, 'result': result})
+
+        with transaction.atomic():
+            FriendRequest.objects.bulk_create(new_requests, ignore_conflicts=True)
+            bump([fr.to_user_id for fr in new_requests], 'pending_count')
+        return Response({'results': results})
+
+    elif request.method == 'PUT':
+        friend_request_ids = parse_id_list(request.data.get('friend_request_ids'))
+        action = request.data.get('action')
+
+        if friend_request_ids is None or not action:
+            return Response({'error': 'Missing friend request IDs or action'}, status=status.HTTP_400_BAD_REQUEST)
+        if action != 'accept':
+            return Response({'error': 'Invalid action'}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = {
+            pk: (from_user_id, to_user_id, accepted)
+            for pk, from_user_id, to_user_id, accepted in FriendRequest.objects.filter(
+                pk__in=friend_request_ids
+            ).values_list('pk', 'from_user_id', 'to_user_id', 'accepted')
+        }
+
+        results = []
+        to_accept = []
+        for friend_request_id in friend_request_ids:
+            if friend_request_id not in found:
+                result = 'Friend request not found'
+            else:
+                from_user_id, to_user_id, accepted = found[friend_request_id]
+                if to_user_id != request.user.pk:
+                    result = 'Not authorised'
+                elif accepted:
+                    result = 'Friend request already accepted'
+                else:
+                    result = 'Friend request accepted'
+                    to_accept.append(friend_request_id)
+            results.append({'friend_request_id': friend_request_id, 'result': result})
+
+        if to_accept:
+            with transaction.atomic():
+                # Lock what is still pending: a concurrent accept or delete
+                # may have taken some since the lookup above
+                pending = dict(
+                    FriendRequest.objects.select_for_update().filter(
+                        pk__in=to_accept, to_user=request.user, accepted=False
+                    ).values_list('pk', 'from_user_id')
+                )
+                if pending:
+                    FriendRequest.objects.filter(pk__in=pending).update(accepted=True)
+                    bump([request.user.pk], 'pending_count', -len(pending))
+                    Friendship.link_ids([(from_user_id, request.user.pk) for from_user_id in pending.values()])
+            for item in results:
+                if item['friend_request_id'] in to_accept and item['friend_request_id'] not in pending:
+                    item['result'] = 'Friend request no longer pending'
+            if pending:
+                request.user.refresh_from_db(fields=['friend_count', 'pending_count'])
+        return Response({'results': results, **dashboard_payload(request.user)})
@@ -0,0 +1,166 @@
+"""
+Async versions of the read-heavy endpoints in views_api.py.
+
+DRF's @api_view is synchronous, so under ASGI every call pays a thread hop
+through sync_to_async. These views use Django's async ORM instead and return
+the same JSON and headers as their views_api counterparts, including the
+ETag/304 answers and user_list_cache, so uvicorn workers can serve them
+without contending for the sync thread pool.
+"""
+from math import ceil
+
+from django.http import HttpResponseNotModified, JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.utils.encoders import JSONEncoder
+
+from .catalogue import ahobby_catalogue
+from .metrics import timed
+from .models import CustomUser
+from .pagination import InvalidCursor
+from .serializers import CurrentUserSerializer, UserSerializer, aprefetch_hobby_names
+from .similarity import similarity_index, RankedUserList
+from .filters import filter_by_age
+from .result_cache import auser_list_generation, user_list_cache
+from .views_api import (
+    USERS_PER_PAGE,
+    etag_matches,
+    keyset_page,
+    parse_user_cursor,
+    requested_fields,
+    user_etag,
+    user_list_cache_key,
+)
+
+
+def api_response(data, status=200, headers=None):
+    return JsonResponse(data, status=status, headers=headers, safe=False, encoder=JSONEncoder)
+
+
+def not_modified(etag):
+    return HttpResponseNotModified(headers={'ETag': etag})
+
+
+def forbidden():
+    # Same body DRF's IsAuthenticated sends with session authentication
+    return api_response(
+        {'detail': 'Authentication credentials were not provided.'},
+        status=status.HTTP_403_FORBIDDEN,
+    )
+
+
+async def serialize_users(users, fields=None):
+    # Includes the hobby names query, as UserListSerializer does in the sync views
+    with timed('serialize'):
+        if fields is None or 'hobbies' in fields:
+            users = await aprefetch_hobby_names(users)
+        return UserSerializer(users, many=True, fields=fields).data
+
+
+@require_GET
+async def current_user_view(request):
+    """
+    Returns the currently authenticated user's details, or 304 when the
+    client's If-None-Match is still current.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return forbidden()
+    etag = user_etag('current', user)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    await aprefetch_hobby_names([user])
+    return api_response(CurrentUserSerializer(user).data, headers={'ETag': etag})
+
+
+@require_GET
+async def current_user_friends_view(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return forbidden()
+    etag = user_etag('friends', user)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    friends = [friend async for friend in user.friends()]
+    return api_response(await serialize_users(friends), headers={'ETag': etag})
+
+
+@require_GET
+async def hobby_list_view(request):
+    """
+    Returns every hobby, from the cached catalogue.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return forbidden()
+    etag, hobbies = await ahobby_catalogue()
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return api_response({'hobbies': hobbies}, headers={'ETag': etag})
+
+
+@require_GET
+async def user_list_view(request):
+    """
+    Fetch a paginated list of users, optionally filtered by age range,
+    ordered by how many hobbies they have in common with the logged-in user.
+    Takes the same `page`, `cursor` and `fields` parameters as the sync view.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return forbidden()
+    fields = requested_fields(request)
+
+    cache_key = generation = None
+    if user_list_cache.enabled:
+        generation = await auser_list_generation()
+        cache_key = user_list_cache_key(request, user, fields)
+        cached = user_list_cache.get(cache_key, generation)
+        if cached is not None:
+            return api_response(cached)
+
+    users_qs = filter_by_age(
+        CustomUser.objects.exclude(pk=user.pk),
+        request.GET.get('min_age'),
+        request.GET.get('max_age'),
+    )
+
+    # The index is in memory; only a reload leaves the event loop
+    users_list = RankedUserList(users_qs, await similarity_index.aranked(user.pk))
+
+    if 'cursor' in request.GET:
+        try:
+            common, last_id = parse_user_cursor(request.GET['cursor'])
+        except InvalidCursor:
+            return api_response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        users = await users_list.aafter(common, last_id, USERS_PER_PAGE + 1)
+        users, next_cursor = keyset_page(users)
+        data = {
+            'users': await serialize_users(users, fields),
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None,
+        }
+        if cache_key is not None:
+            user_list_cache.put(cache_key, data, generation)
+        return api_response(data)
+
+    # Same rules as Paginator.get_page: bad numbers give page 1, out of range the last page
+    num_pages = max(1, ceil(await users_list.acount() / USERS_PER_PAGE))
+    try:
+        number = int(request.GET.get('page', 1))
+    except (TypeError, ValueError):
+        number = 1
+    if number < 1 or number > num_pages:
+        number = num_pages
+    start = (number - 1) * USERS_PER_PAGE
+    users = await users_list.aslice(start, start + USERS_PER_PAGE)
+
+    data = {
+        'users': await serialize_users(users, fields),
+        'page': number,
+        'total_pages': num_pages,
+        'has_next': number < num_pages,
+    }
+    if cache_key is not None:
+        user_list_cache.put(cache_key, data, generation)
+    return api_response(data)
@@ -25,7 +25,8 @@ const router = createRouter({
 router.beforeEach(async () => {
   const userStore = useUserStore();
   if (!userStore.currentUser) {
-    await userStore.fetchCurrentUser();
+    // Also loads the main page's friend requests and friends
+    await userStore.fetchBootstrap();
   }
   return true;
 });
@@ -1,6 +1,6 @@
 import { defineStore } from 'pinia';
 import { ref } from 'vue';
-import type { IUser, IUserUpdate } from '../types';
+import type { IDashboard, IUser, IUserUpdate } from '../types';
 import { getCsrfToken } from '../utils/csrf';
 
 export const useUserStore = defineStore('userStore', () => {
@@ -15,6 +15,33 @@ export const useUserStore = defineStore('userStore', () => {
   // list of friends 
   const friendsList = ref<IUser[]>([]);
 
+  // set once the main page has shown the bootstrap data, so it reloads next time
+  const dashboardStale = ref<boolean>(true);
+
+  function applyDashboard(data: IDashboard): void {
+    currentUser.value = data.current_user;
+    pendingFriendRequests.value = data.friend_requests;
+    friendsList.value = data.friends;
+  }
+
+  // The current user, pending friend requests and friends in one round trip
+  async function fetchBootstrap(): Promise<void> {
+    try {
+      const response = await fetch('/api/bootstrap/', {
+        method: 'GET',
+        headers: { 'Content-Type': 'application/json' },
+      });
+      if (!response.ok) {
+        console.error('Error fetching dashboard');
+        return;
+      }
+      applyDashboard(await response.json());
+      dashboardStale.value = false;
+    } catch (error) {
+      console.error('Error in fetchBootstrap:', error);
+    }
+  }
+
   async function fetchMe(userId: number): Promise<void> {
     try {
       const response = await fetch(`/api/users/${userId}/`, {
@@ -165,7 +192,10 @@ export const useUserStore = defineStore('userStore', () => {
       if (!response.ok) {
         throw new Error('Failed to accept friend request');
       }
-      return await response.json();
+      // The response carries the updated requests and friends
+      const data = await response.json();
+      applyDashboard(data);
+      return data;
     } catch (error) {
       console.error('Error in acceptFriendRequest:', error);
       throw error;
@@ -197,6 +227,8 @@ export const useUserStore = defineStore('userStore', () => {
     totalPages,
     pendingFriendRequests,
     friendsList,
+    dashboardStale,
+    fetchBootstrap,
     fetchMe,
     fetchCurrentUser,
     fetchUsers,
@@ -10,6 +10,21 @@ export interface IUser {
   email: string;
   date_of_birth?: string;
   hobbies: string[];
+  common_hobbies?: number;
+}
+
+export interface IFriendRequest {
+  id: number;
+  from_user: string;
+  to_user: string;
+  accepted: boolean;
+  created_at: string;
+}
+
+export interface IDashboard {
+  current_user: IUser;
+  friend_requests: IFriendRequest[];
+  friends: IUser[];
 }
 
 export interface IFriendRequestPayload {
@@ -3,13 +3,18 @@ Django settings for project.
 """
 
 import os
+import sys
 from pathlib import Path
 from typing import List
 
+from . import database
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'YOUR-SECRET-KEY'  
-DEBUG = True  
+# DEBUG=0 in production: WhiteNoise then indexes static files once at startup
+# and main_spa serves its pre-rendered shell
+DEBUG = os.getenv('DEBUG', '1') == '1'
 
 ALLOWED_HOSTS: List[str] = [
     '127.0.0.1',
@@ -29,7 +34,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost so its timings cover the rest of the stack; inert unless REQUEST_METRICS
+    'api.metrics.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    # Needs the session; inert unless DATABASE_REPLICAS is set
+    'api.replicas.ReplicaRoutingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -60,17 +69,82 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'project.wsgi.application'
 
-# Database
+# Database, configured from the environment (see project/database.py)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database.config(BASE_DIR),
+    **database.replicas(BASE_DIR),
 }
 
+# Safe-method API reads go to these replicas (see api/replicas.py), except for
+# READ_REPLICA_PIN_SECONDS after the same session last wrote
+READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+READ_REPLICA_PIN_SECONDS = int(os.getenv('READ_REPLICA_PIN_SECONDS', '5'))
+# `manage.py test` always gets a replica alias mirroring the test database, so
+# routing can be tested end to end. Tests opt in to reading from it with
+# override_settings(READ_REPLICAS=['replica_0'])
+if sys.argv[1:2] == ['test'] and not READ_REPLICAS:
+    DATABASES['replica_0'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+# Cache used for the hobby catalogue. Local memory by default; set
+# CACHE_BACKEND=file or CACHE_BACKEND=db to share it between workers (the db
+# backend needs `python manage.py createcachetable`)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')),
+        }
+    }
+elif CACHE_BACKEND == 'db':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': os.getenv('CACHE_LOCATION', 'django_cache'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Custom user model
 AUTH_USER_MODEL = 'api.CustomUser'
 
+# Session storage. SESSION_MODE=cached_db reads sessions from the cache and
+# only falls back to django_session on a miss; SESSION_MODE=signed_cookies
+# keeps them client-side, so there is no session table at all
+SESSION_MODE = os.getenv('SESSION_MODE', 'db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_MODE]
+
+# Keep up to AUTH_USER_CACHE_SIZE authenticated users in each worker, each for
+# at most AUTH_USER_CACHE_TTL seconds, instead of loading request.user on every
+# request (see api/auth.py). Use a shared CACHE_BACKEND with several workers so
+# profile updates invalidate every worker's copy at once
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '0'))
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '60'))
+if AUTH_USER_CACHE_SIZE > 0:
+    # Sessions store the backend path, so existing logins end once when enabled
+    AUTHENTICATION_BACKENDS = ['api.auth.CachedModelBackend']
+
+# Password hashing. PASSWORD_HASHER_PROFILE=fast swaps PBKDF2 for a cheap
+# hasher so the test suite and benchmarks are not dominated by hashing; it is
+# the default for `manage.py test` and `manage.py bench`. Never use it in
+# production.
+PASSWORD_HASHER_PROFILE = os.getenv(
+    'PASSWORD_HASHER_PROFILE',
+    'fast' if sys.argv[1:2] in (['test'], ['bench']) else 'default',
+)
+if PASSWORD_HASHER_PROFILE == 'fast':
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,13 +161,28 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
-# Static files
+# Static files. The Vite build lands in api/static/api/spa, which the app
+# directories finder collects. collectstatic writes hashed names plus .gz and
+# .br variants (brotli needs the Brotli package), and WhiteNoise, wrapped
+# around the WSGI app in project/wsgi.py, serves them with far-future headers
+# on hashed names. Under ASGI, serve STATIC_ROOT from the front server.
 STATIC_URL = '/static/'
-STATICFILES_DIRS = [
-    BASE_DIR / 'frontend/',
-]
-
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+# Fall back to the plain name for files collectstatic has not seen yet
+WHITENOISE_MANIFEST_STRICT = False
+# Vite's own content-hashed bundle names (index-CWwAw8n9.js) are immutable too,
+# as are the names the manifest storage adds (style.3f2a9c1b7d4e.css)
+WHITENOISE_IMMUTABLE_FILE_TEST = (
+    r'^' + STATIC_URL + r'(api/spa/assets/.+-[\w-]{8}|.+\.[0-9a-f]{12})\.\w+$'
+)
 
 # Internationalisation
 LANGUAGE_CODE = 'en-gb'
@@ -103,3 +192,27 @@ USE_L10N = True
 USE_TZ = True
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Seconds before each worker reloads its in-process hobby similarity index.
+# Hobby writes through the ORM make every worker sharing CACHE_BACKEND reload
+# at once; this bounds how long others (raw SQL, a per-process cache) go unseen
+HOBBY_INDEX_TTL = int(os.getenv('HOBBY_INDEX_TTL', '300'))
+
+# Rankings each worker keeps from its similarity index, one per user who
+# recently listed users. Any hobby change replaces them all
+HOBBY_RANKING_CACHE_SIZE = int(os.getenv('HOBBY_RANKING_CACHE_SIZE', '64'))
+
+# Seconds the cached hobby catalogue lives. Creating a hobby invalidates it
+# at once for every worker sharing CACHE_BACKEND; with the default per-process
+# cache, other workers pick the new hobby up within this time
+HOBBY_CATALOGUE_TTL = int(os.getenv('HOBBY_CATALOGUE_TTL', '300'))
+
+# Keep up to USER_LIST_CACHE_SIZE /api/users/ result pages per worker, each for
+# at most USER_LIST_CACHE_TTL seconds (see api/result_cache.py). Hit and miss
+# counts are reported at /api/metrics/
+USER_LIST_CACHE_SIZE = int(os.getenv('USER_LIST_CACHE_SIZE', '0'))
+USER_LIST_CACHE_TTL = int(os.getenv('USER_LIST_CACHE_TTL', '60'))
+
+# Record per-request query counts and timings, send them as Server-Timing
+# headers and aggregate them per endpoint at /api/metrics/ (admin only)
+REQUEST_METRICS = os.getenv('REQUEST_METRICS', '') == '1'
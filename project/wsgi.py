@@ -9,8 +9,20 @@ https://docs.djangoproject.com/en/stable/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
+from whitenoise import WhiteNoise
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
-application = get_wsgi_application()
+# Static files are answered here, before Django's handler. WhiteNoise is
+# sync-only, so as Django middleware it would push every ASGI request through
+# a thread; wrapping only the WSGI app keeps the ASGI chain async.
+application = WhiteNoise(
+    get_wsgi_application(),
+    root=settings.STATIC_ROOT,
+    prefix=settings.STATIC_URL,
+    autorefresh=settings.DEBUG,
+    max_age=0 if settings.DEBUG else 60,
+    immutable_file_test=settings.WHITENOISE_IMMUTABLE_FILE_TEST,
+)